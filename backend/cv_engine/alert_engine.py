@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+# Nivel de alerta por severidad de métrica: 0 = sin alerta
+SEVERITY_LEVEL: Dict[str, int] = {
+    "optimal": 0,
+    "acceptable": 0,
+    "warning": 1,
+    "critical": 2,
+}
+LEVEL_SEVERITY: Dict[int, str] = {1: "warning", 2: "critical"}
+
+# Tipo de alerta compartido con el frontend (`PostureAlertType` en shared/types.ts)
+ALERT_TYPE_BY_METRIC: Dict[str, str] = {
+    "neck_angle": "neck_forward",
+    "back_angle": "hunched_back",
+    "shoulder_alignment": "raised_shoulders",
+    "elbow_angle": "poor_arm_position",
+}
+
+
+@dataclass
+class AlertRules:
+    """Reglas temporales de la máquina de estados (en segundos).
+
+    - `debounce_s`: tiempo continuo en warning o critical (en cualquier combinación) antes de emitir `enter`.
+    - `escalate_s`: tiempo sostenido en critical (estando en warning) antes de emitir `escalate`.
+    - `clear_s`: tiempo sostenido en rango saludable antes de emitir `clear`.
+    - `cooldown_s`: tiempo mínimo tras un `clear` antes de permitir un nuevo `enter`.
+    """
+
+    debounce_s: float = 5.0
+    escalate_s: float = 10.0
+    clear_s: float = 3.0
+    cooldown_s: float = 30.0
+
+
+@dataclass
+class _MetricState:
+    level: int = 0  # nivel activo emitido (0 = inactivo)
+    # Inicio del tramo continuo observado en cada condición; se siguen por separado para que
+    # oscilar entre warning y critical no reinicie el debounce de `enter`
+    unhealthy_since: Optional[float] = None  # warning o critical
+    critical_since: Optional[float] = None
+    healthy_since: Optional[float] = None
+    entered_at: Optional[float] = None
+    cleared_at: Optional[float] = None
+
+
+class AlertStateMachine:
+    """Máquina de estados de alerta para una métrica.
+
+    Estados: inactivo -> (debounce) -> activo(warning|critical) -> (clear) -> inactivo.
+    Solo devuelve un evento en las transiciones; en régimen estable devuelve `None`.
+
+    Ejemplo
+    -------
+    >>> sm = AlertStateMachine("neck_angle", AlertRules(debounce_s=1.0))
+    >>> sm.update("warning", now=0.0) is None
+    True
+    >>> sm.update("warning", now=1.0)["type"]
+    'enter'
+    """
+
+    def __init__(self, metric: str, rules: AlertRules) -> None:
+        self.metric = metric
+        self.rules = rules
+        self._state = _MetricState()
+
+    @property
+    def active_severity(self) -> Optional[str]:
+        return LEVEL_SEVERITY.get(self._state.level)
+
+    def update(self, severity: Optional[str], now: float) -> Optional[Dict[str, Any]]:
+        """Alimenta la severidad observada y devuelve un evento si hay transición."""
+        st = self._state
+        observed = SEVERITY_LEVEL.get(severity or "", 0)
+
+        if observed == 0:
+            st.unhealthy_since = st.critical_since = None
+            if st.healthy_since is None:
+                st.healthy_since = now
+        else:
+            st.healthy_since = None
+            if st.unhealthy_since is None:
+                st.unhealthy_since = now
+            if observed < 2:
+                st.critical_since = None
+            elif st.critical_since is None:
+                st.critical_since = now
+
+        if st.level == 0:
+            if observed == 0 or now - st.unhealthy_since < self.rules.debounce_s:
+                return None
+            if st.cleared_at is not None and now - st.cleared_at < self.rules.cooldown_s:
+                return None
+            st.level = observed
+            st.entered_at = now
+            return self._event("enter", now)
+
+        if observed == 0:
+            if now - st.healthy_since < self.rules.clear_s:
+                return None
+            st.level = 0
+            st.cleared_at = now
+            event = self._event("clear", now, severity=None)
+            st.entered_at = None
+            return event
+
+        if st.level < 2 and st.critical_since is not None and now - st.critical_since >= self.rules.escalate_s:
+            st.level = 2
+            return self._event("escalate", now)
+        return None
+
+    def reset(self) -> None:
+        self._state = _MetricState()
+
+    def _event(self, kind: str, now: float, severity: Optional[str] = "") -> Dict[str, Any]:
+        st = self._state
+        return {
+            "type": kind,
+            "metric": self.metric,
+            "alert_type": ALERT_TYPE_BY_METRIC.get(self.metric, self.metric),
+            "severity": LEVEL_SEVERITY.get(st.level) if severity == "" else severity,
+            "ts": now,
+            "active_for_s": round(now - st.entered_at, 2) if st.entered_at is not None else 0.0,
+        }
+
+
+class AlertEngine:
+    """Evalúa alertas por métrica en el backend y emite solo eventos de transición.
+
+    Sustituye la evaluación por frame que hacía cada renderer: los clientes solo reaccionan
+    a `enter` / `escalate` / `clear`.
+
+    Ejemplo
+    -------
+    >>> engine = AlertEngine(AlertRules(debounce_s=0.0))
+    >>> [e["type"] for e in engine.update({"neck_angle": "critical"}, now=0.0)]
+    ['enter']
+    """
+
+    def __init__(self, rules: Optional[AlertRules] = None, metrics: Optional[List[str]] = None) -> None:
+        self.rules = rules or AlertRules()
+        self._machines: Dict[str, AlertStateMachine] = {}
+        for metric in metrics or list(ALERT_TYPE_BY_METRIC):
+            self._machines[metric] = AlertStateMachine(metric, self.rules)
+
+    def update(self, severity_by_metric: Optional[Dict[str, str]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Procesa las severidades de un análisis. Métricas ausentes cuentan como saludables."""
+        ts = time.time() if now is None else now
+        sev = severity_by_metric or {}
+        events: List[Dict[str, Any]] = []
+        for metric, machine in self._machines.items():
+            event = machine.update(sev.get(metric), ts)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def active_alerts(self) -> Dict[str, str]:
+        """Métricas con alerta activa y su severidad."""
+        return {m: s for m, sm in self._machines.items() if (s := sm.active_severity) is not None}
+
+    def reset(self) -> List[Dict[str, Any]]:
+        """Reinicia todas las máquinas; devuelve `clear` para las alertas que seguían activas."""
+        now = time.time()
+        events: List[Dict[str, Any]] = []
+        for machine in self._machines.values():
+            if machine.active_severity is not None:
+                events.append(machine._event("clear", now, severity=None))
+            machine.reset()
+        return events
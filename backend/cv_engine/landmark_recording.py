@@ -0,0 +1,275 @@
+"""Grabación binaria de landmarks y reproducción rápida.
+
+Formato (little-endian, solo-anexado):
+
+```
++-------------------- cabecera (64 B) --------------------+
+| magic "ERGLMK01" | version u16 | n_landmarks u16 | fields u16 | reservado u16 |
+| record_size u32  | created_at f64 | relleno                                   |
++-------------------- registro (540 B) -------------------+
+| ts f64 | flags u32 (bit0 = hay pose) | 33 x (x, y, z, visibility) float32     |
++---------------------------------------------------------+
+```
+
+Solo se guardan landmarks normalizados (nunca imágenes), conforme a la política de privacidad.
+Un registro truncado al final (cierre abrupto) se ignora al leer y se recorta al reabrir para
+anexar. Las grabaciones siguen la misma retención que el historial (`purge_old_recordings`).
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .ergonomic_analyzer import ErgonomicAnalyzer, ERGONOMIC_STANDARDS
+
+
+MAGIC = b"ERGLMK01"
+FORMAT_VERSION = 1
+N_LANDMARKS = 33
+FIELDS = ("x", "y", "z", "visibility")
+FLAG_POSE = 0x1
+
+HEADER = struct.Struct("<8sHHHHId36x")
+RECORD = struct.Struct(f"<dI{N_LANDMARKS * len(FIELDS)}f")
+_PREFIX = struct.Struct("<dI")
+_EMPTY_VALUES = (0.0,) * (N_LANDMARKS * len(FIELDS))
+
+DEFAULT_RECORDINGS_DIR = Path(
+    os.environ.get("ERGONOMIC_RECORDINGS", Path(__file__).resolve().parent.parent / "recordings")
+)
+
+
+class LandmarkRecorder:
+    """Escritor solo-anexado de registros de tamaño fijo.
+
+    `append()` empaqueta en un buffer preasignado y escribe a un fichero con buffer de 64 KiB,
+    por lo que el coste por frame es de microsegundos y puede dejarse activo.
+
+    Ejemplo
+    -------
+    >>> import tempfile, os
+    >>> path = os.path.join(tempfile.mkdtemp(), "s.erglm")
+    >>> with LandmarkRecorder(path) as rec:
+    ...     rec.append(0.0, None)
+    >>> len(LandmarkRecording(path))
+    1
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str", buffer_size: int = 64 * 1024) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        exists = size >= HEADER.size
+        if exists:
+            _read_header(self.path)
+        # Recortar un registro (o cabecera) a medio escribir por un cierre abrupto: anexar tras
+        # él desalinearía todos los registros siguientes
+        aligned = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size if exists else 0
+        if size != aligned:
+            os.truncate(self.path, aligned)
+        self._file = open(self.path, "ab", buffering=buffer_size)
+        if not exists:
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, N_LANDMARKS, len(FIELDS), 0, RECORD.size, time.time()))
+        self._buf = bytearray(RECORD.size)
+        self.records_written = 0
+
+    def append(self, ts: float, landmarks: Optional[List[Dict[str, float]]]) -> None:
+        """Anexa un registro; `landmarks=None` marca un frame sin pose."""
+        if landmarks:
+            values = [float(lm[f]) for lm in landmarks[:N_LANDMARKS] for f in FIELDS]
+            if len(values) < len(_EMPTY_VALUES):
+                values.extend(_EMPTY_VALUES[len(values):])
+            RECORD.pack_into(self._buf, 0, ts, FLAG_POSE, *values)
+        else:
+            RECORD.pack_into(self._buf, 0, ts, 0, *_EMPTY_VALUES)
+        self._file.write(self._buf)
+        self.records_written += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "LandmarkRecorder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class LandmarkRecording:
+    """Lectura con memory-mapping y acceso aleatorio a una grabación.
+
+    Ejemplo
+    -------
+    >>> rec = LandmarkRecording("session.erglm")  # doctest: +SKIP
+    >>> ts, landmarks = rec[10]  # doctest: +SKIP
+    >>> i = rec.index_at(ts)  # doctest: +SKIP
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str") -> None:
+        self.path = Path(path)
+        header = _read_header(self.path)
+        self.created_at: float = header["created_at"]
+        self._fh = open(self.path, "rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self._count = max(0, (size - HEADER.size) // RECORD.size)
+        self._mm: Optional[mmap.mmap] = (
+            mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if self._count else None
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def timestamp(self, i: int) -> float:
+        return _PREFIX.unpack_from(self._view(), self._offset(i))[0]
+
+    def __getitem__(self, i: int) -> Tuple[float, Optional[List[Dict[str, float]]]]:
+        if i < 0:
+            i += self._count
+        values = RECORD.unpack_from(self._view(), self._offset(i))
+        ts, flags = values[0], values[1]
+        if not flags & FLAG_POSE:
+            return ts, None
+        raw = values[2:]
+        n = len(FIELDS)
+        landmarks = [dict(zip(FIELDS, raw[j:j + n])) for j in range(0, len(raw), n)]
+        return ts, landmarks
+
+    def __iter__(self) -> Iterator[Tuple[float, Optional[List[Dict[str, float]]]]]:
+        for i in range(self._count):
+            yield self[i]
+
+    def index_at(self, ts: float) -> int:
+        """Índice del primer registro con timestamp >= `ts` (búsqueda binaria sobre el mmap)."""
+        return bisect.bisect_left(_TimestampView(self), ts)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._fh.close()
+
+    def __enter__(self) -> "LandmarkRecording":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------ utilidades internas ------------------------
+    def _view(self) -> mmap.mmap:
+        if self._mm is None:
+            raise IndexError("recording is empty or closed")
+        return self._mm
+
+    def _offset(self, i: int) -> int:
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return HEADER.size + i * RECORD.size
+
+
+class _TimestampView:
+    """Secuencia perezosa de timestamps para `bisect` sin materializar la grabación."""
+
+    def __init__(self, recording: LandmarkRecording) -> None:
+        self._rec = recording
+
+    def __len__(self) -> int:
+        return len(self._rec)
+
+    def __getitem__(self, i: int) -> float:
+        return self._rec.timestamp(i)
+
+
+def replay(
+    recording: LandmarkRecording,
+    analyzer: ErgonomicAnalyzer,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Reproduce la grabación por `analyzer` tan rápido como permita la CPU.
+
+    Produce `(ts, analysis)`; los frames sin pose producen `{"overall_severity": "no_pose"}`
+    igual que el bucle en vivo.
+    """
+    for i in range(start, len(recording) if stop is None else min(stop, len(recording))):
+        ts, landmarks = recording[i]
+        if landmarks is None:
+            yield ts, {"overall_severity": "no_pose"}
+        else:
+            yield ts, analyzer.analyze_pose({"landmarks": landmarks})
+
+
+def resolve_recordings_dir(value: str) -> Path:
+    """Resuelve `recording.dir`: vacío -> raíz por defecto; relativo -> bajo la raíz.
+
+    Lanza `ValueError` si la ruta resultante queda fuera de `DEFAULT_RECORDINGS_DIR`.
+    """
+    root = DEFAULT_RECORDINGS_DIR.resolve()
+    if not value:
+        return root
+    candidate = (root / value).resolve()
+    if candidate != root and root not in candidate.parents:
+        raise ValueError(f"recording_dir_outside_root: {value}")
+    return candidate
+
+
+def purge_old_recordings(max_age_days: int, root: Optional[Path] = None) -> int:
+    """Borra grabaciones `.erglm` con más de `max_age_days` días bajo `root`. Devuelve cuántas."""
+    root = DEFAULT_RECORDINGS_DIR if root is None else root
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for path in root.rglob("*.erglm"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue  # en uso o ya borrada
+    return removed
+
+
+def _read_header(path: Path) -> Dict[str, Any]:
+    with open(path, "rb") as fh:
+        raw = fh.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"invalid_recording: {path}")
+    magic, version, n_landmarks, fields, _reserved, record_size, created_at = HEADER.unpack(raw)
+    if magic != MAGIC or version != FORMAT_VERSION or n_landmarks != N_LANDMARKS or fields != len(FIELDS) or record_size != RECORD.size:
+        raise ValueError(f"invalid_recording: {path}")
+    return {"version": version, "created_at": created_at}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Re-puntúa una grabación con los umbrales actuales e imprime el reparto de severidades."""
+    parser = argparse.ArgumentParser(description="Reproduce una grabación de landmarks por ErgonomicAnalyzer")
+    parser.add_argument("path")
+    args = parser.parse_args(argv)
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    counts: Counter[str] = Counter()
+    with LandmarkRecording(args.path) as rec:
+        t0 = time.perf_counter()
+        for _, analysis in replay(rec, analyzer):
+            counts[analysis.get("overall_severity", "unknown")] += 1
+        elapsed = time.perf_counter() - t0
+        span = rec.timestamp(len(rec) - 1) - rec.timestamp(0) if len(rec) > 1 else 0.0
+    total = sum(counts.values())
+    print(f"frames={total} elapsed_s={elapsed:.3f} fps={total / elapsed if elapsed else 0:.0f} "
+          f"speedup={span / elapsed if elapsed else 0:.1f}x")
+    for severity, n in counts.most_common():
+        print(f"  {severity}: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+Point = Tuple[float, float]
+
+SEVERITY_LABELS: Tuple[str, ...] = ("optimal", "acceptable", "warning", "critical")
+SEVERITY_RANK: Dict[str, int] = {label: i for i, label in enumerate(SEVERITY_LABELS)}
+
+
+# ----------------------------- primitivas geométricas -----------------------------
+def midpoint(a: Point, b: Point) -> Point:
+    return ((a[0] + b[0]) / 2.0, (a[1] + b[1]) / 2.0)
+
+
+def vector(a: Point, b: Point) -> Point:
+    return (b[0] - a[0], b[1] - a[1])
+
+
+def angle_between(u: Point, v: Point) -> float:
+    ux, uy = u
+    vx, vy = v
+    nu = math.hypot(ux, uy)
+    nv = math.hypot(vx, vy)
+    if nu == 0 or nv == 0:
+        return 0.0
+    cosang = (ux * vx + uy * vy) / (nu * nv)
+    return math.degrees(math.acos(-1.0 if cosang < -1.0 else 1.0 if cosang > 1.0 else cosang))
+
+
+def angle_from_vertical(v: Point) -> float:
+    """`angle_between(v, UP)` sin la norma ni el producto escalar con `UP` (ambos triviales)."""
+    vx, vy = v
+    nv = math.hypot(vx, vy)
+    if nv == 0:
+        return 0.0
+    cosang = -vy / nv
+    return math.degrees(math.acos(-1.0 if cosang < -1.0 else 1.0 if cosang > 1.0 else cosang))
+
+
+def joint_angle(a: Point, b: Point, c: Point) -> float:
+    """Ángulo en `b` formado por a-b-c."""
+    bx, by = b
+    return angle_between((a[0] - bx, a[1] - by), (c[0] - bx, c[1] - by))
+
+
+UP: Point = (0.0, -1.0)
+
+
+# ----------------------------- declaraciones -----------------------------
+@dataclass(frozen=True)
+class Intermediate:
+    """Valor intermedio compartido (punto medio, vector, ángulo articular...).
+
+    `deps` son nombres de otros intermedios o landmarks `lm:<índice>` (coordenadas x, y).
+    """
+
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[..., Any]
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Métrica ergonómica declarativa.
+
+    - `deps`: intermedios o landmarks que necesita `fn`.
+    - `direction`: cómo se clasifican los umbrales de `ERGONOMIC_STANDARDS`:
+      `lower` (0 óptimo, mayor es peor), `higher` (mayor es mejor) o `deviation`
+      (distancia a `optimal` contra `deviation_bounds`).
+    - `recommendation`: texto cuando la severidad es warning o critical.
+    """
+
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[..., float]
+    direction: str
+    recommendation: str
+    deviation_bounds: Tuple[float, float, float] = (5.0, 10.0, 20.0)
+
+
+def _lm(idx: int) -> str:
+    return f"lm:{idx}"
+
+
+class MetricRegistry:
+    """Registro de intermedios y métricas; `compile()` produce un `EvaluationPlan`.
+
+    Ejemplo
+    -------
+    >>> plan = DEFAULT_REGISTRY.compile(["neck_angle"], {"neck_angle": {"optimal": 0, "acceptable": 15, "warning": 25}})
+    >>> plan.metric_names
+    ('neck_angle',)
+    """
+
+    def __init__(self) -> None:
+        self._intermediates: Dict[str, Intermediate] = {}
+        self._metrics: Dict[str, Metric] = {}
+
+    @property
+    def metric_names(self) -> Tuple[str, ...]:
+        return tuple(self._metrics)
+
+    def add_intermediate(self, name: str, deps: Sequence[str], fn: Callable[..., Any]) -> None:
+        self._intermediates[name] = Intermediate(name, tuple(deps), fn)
+
+    def add_metric(self, metric: Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def compile(self, metrics: Optional[Iterable[str]], standards: Dict[str, Dict[str, float]]) -> "EvaluationPlan":
+        """Compila un plan solo con las métricas pedidas (en orden de registro).
+
+        Cada intermedio necesario se calcula una única vez por frame aunque lo usen varias
+        métricas; los no necesarios se omiten. Los umbrales se precalculan en tablas ordenadas.
+        """
+        wanted = set(self._metrics) if metrics is None else set(metrics)
+        unknown = wanted - set(self._metrics)
+        if unknown:
+            raise ValueError(f"unknown_metrics: {sorted(unknown)}")
+        selected = [m for name, m in self._metrics.items() if name in wanted]
+
+        slots: Dict[str, int] = {}
+        landmark_slots: List[Tuple[int, int]] = []  # (slot, índice de landmark)
+        steps: List[Tuple[int, Callable[..., Any], Tuple[int, ...]]] = []
+
+        def resolve(name: str) -> int:
+            if name in slots:
+                return slots[name]
+            if name.startswith("lm:"):
+                slot = len(slots)
+                slots[name] = slot
+                landmark_slots.append((slot, int(name[3:])))
+                return slot
+            node = self._intermediates[name]
+            dep_slots = tuple(resolve(d) for d in node.deps)
+            slot = len(slots)
+            slots[name] = slot
+            steps.append((slot, node.fn, dep_slots))
+            return slot
+
+        compiled: List[_CompiledMetric] = []
+        for metric in selected:
+            dep_slots = tuple(resolve(d) for d in metric.deps)
+            compiled.append(_CompiledMetric(
+                name=metric.name,
+                fn=metric.fn,
+                dep_slots=dep_slots,
+                sign=-1.0 if metric.direction == "higher" else 1.0,
+                offset=_deviation_center(metric, standards),
+                bounds=_threshold_table(metric, standards.get(metric.name, {})),
+                recommendation=metric.recommendation,
+            ))
+        return EvaluationPlan(len(slots), tuple(landmark_slots), tuple(steps), tuple(compiled))
+
+
+@dataclass(frozen=True)
+class _CompiledMetric:
+    name: str
+    fn: Callable[..., float]
+    dep_slots: Tuple[int, ...]
+    sign: float
+    offset: Optional[float]
+    bounds: Tuple[float, ...]
+    recommendation: str
+
+
+def _deviation_center(metric: Metric, standards: Dict[str, Dict[str, float]]) -> Optional[float]:
+    if metric.direction != "deviation":
+        return None
+    return float(standards.get(metric.name, {}).get("optimal", 0.0))
+
+
+def _threshold_table(metric: Metric, s: Dict[str, float]) -> Tuple[float, ...]:
+    """Límites superiores (inclusive) de optimal/acceptable/warning, ya ordenados.
+
+    Reproduce el orden de comprobación original: si los umbrales se solapan, gana la banda
+    más favorable.
+    """
+    if metric.direction == "deviation":
+        return tuple(float(b) for b in metric.deviation_bounds)
+    if metric.direction == "higher":
+        # value >= optimal - 2 -> optimal; >= acceptable -> acceptable; >= warning -> warning
+        t0 = float(s.get("optimal", 100)) - 2
+        t1 = min(float(s.get("acceptable", 90)), t0)
+        t2 = min(float(s.get("warning", 80)), t1)
+        return (-t0, -t1, -t2)
+    # lower: value <= acceptable y <= optimal + 2 -> optimal; <= acceptable; <= warning
+    acceptable = float(s.get("acceptable", 15))
+    t0 = min(float(s.get("optimal", 0)) + 2, acceptable)
+    t2 = max(float(s.get("warning", 25)), acceptable)
+    return (t0, acceptable, t2)
+
+
+def _build_compute(
+    n_slots: int,
+    landmark_slots: Tuple[Tuple[int, int], ...],
+    steps: Tuple[Tuple[int, Callable[..., Any], Tuple[int, ...]], ...],
+    metrics: Tuple[_CompiledMetric, ...],
+) -> Callable[[Sequence[Dict[str, float]]], Dict[str, float]]:
+    """Cierra sobre los pasos del plan: un bucle plano sobre una lista de slots.
+
+    Los slots de cada paso se desempaquetan al compilar y la llamada se despacha por aridad
+    (1-3 argumentos, los de todas las primitivas), así el coste por frame es el de las
+    primitivas geométricas sin construir tuplas de argumentos.
+    """
+
+    def flatten(deps: Tuple[int, ...]) -> Tuple[Any, ...]:
+        a, b, c = (deps + (0, 0, 0))[:3]
+        return (len(deps), a, b, c, deps)
+
+    plan_steps = tuple((slot, fn) + flatten(deps) for slot, fn, deps in steps)
+    metric_steps = tuple((m.name, m.fn) + flatten(m.dep_slots) for m in metrics)
+
+    def compute(landmarks: Sequence[Dict[str, float]]) -> Dict[str, float]:
+        v: List[Any] = [None] * n_slots
+        for slot, idx in landmark_slots:
+            lm = landmarks[idx]
+            # `* 1.0` normaliza enteros (p. ej. de JSON) a float sin llamar a `float()`
+            v[slot] = (lm["x"] * 1.0, lm["y"] * 1.0)
+        for slot, fn, n, a, b, c, deps in plan_steps:
+            if n == 2:
+                v[slot] = fn(v[a], v[b])
+            elif n == 3:
+                v[slot] = fn(v[a], v[b], v[c])
+            elif n == 1:
+                v[slot] = fn(v[a])
+            else:
+                v[slot] = fn(*[v[d] for d in deps])
+        out: Dict[str, float] = {}
+        for name, fn, n, a, b, c, deps in metric_steps:
+            if n == 1:
+                value = fn(v[a])
+            elif n == 2:
+                value = fn(v[a], v[b])
+            elif n == 3:
+                value = fn(v[a], v[b], v[c])
+            else:
+                value = fn(*[v[d] for d in deps])
+            out[name] = round(value, 2)
+        return out
+
+    return compute
+
+
+class EvaluationPlan:
+    """Plan de evaluación compilado: slots planos, pasos ordenados y tablas de umbrales."""
+
+    def __init__(
+        self,
+        n_slots: int,
+        landmark_slots: Tuple[Tuple[int, int], ...],
+        steps: Tuple[Tuple[int, Callable[..., Any], Tuple[int, ...]], ...],
+        metrics: Tuple[_CompiledMetric, ...],
+    ) -> None:
+        self._n_slots = n_slots
+        self._landmark_slots = landmark_slots
+        self._steps = steps
+        self._metrics = metrics
+        self._by_name = {m.name: m for m in metrics}
+        # Copia plana de los umbrales para `classify` (sin acceso a atributos por métrica)
+        self._thresholds = tuple((m.name, m.sign, m.offset, m.bounds) for m in metrics)
+        self._compute = _build_compute(n_slots, landmark_slots, steps, metrics)
+        self.metric_names: Tuple[str, ...] = tuple(m.name for m in metrics)
+
+    @property
+    def n_intermediates(self) -> int:
+        return len(self._steps)
+
+    def compute(self, landmarks: Sequence[Dict[str, float]]) -> Dict[str, float]:
+        """Calcula las métricas del plan (grados, redondeadas a 2 decimales)."""
+        return self._compute(landmarks)
+
+    def classify(self, angles: Dict[str, float]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for name, sign, offset, bounds in self._thresholds:
+            value = angles.get(name)
+            if value is not None:
+                if offset is not None:
+                    value = abs(value - offset)
+                out[name] = SEVERITY_LABELS[bisect_left(bounds, sign * value)]
+        return out
+
+    def classify_one(self, metric: str, value: float) -> str:
+        return self._classify(self._by_name[metric], value)
+
+    def recommendations(self, severity_by_metric: Dict[str, str]) -> List[str]:
+        warning = SEVERITY_RANK["warning"]
+        return [
+            m.recommendation
+            for m in self._metrics
+            if SEVERITY_RANK.get(severity_by_metric.get(m.name, ""), -1) >= warning
+        ]
+
+    @staticmethod
+    def _classify(m: _CompiledMetric, value: float) -> str:
+        if m.offset is not None:
+            value = abs(value - m.offset)
+        return SEVERITY_LABELS[bisect_left(m.bounds, m.sign * value)]
+
+
+# ----------------------------- registro por defecto -----------------------------
+# Índices de MediaPipe Pose (v0.10+)
+NOSE, LEFT_EAR, RIGHT_EAR = 0, 7, 8
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_INDEX, RIGHT_INDEX = 19, 20
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+# Métricas calculadas por defecto (alertas y resumen de sesión dependen de ellas)
+CORE_METRICS: Tuple[str, ...] = ("neck_angle", "back_angle", "elbow_angle", "shoulder_alignment")
+
+
+def _back_angle(trunk_vec: Point, ear_mid: Point, hip_mid: Point) -> float:
+    # Escala OSHA ~70-100: 90 +/- desviación del tronco respecto a la vertical; el signo
+    # (reclinación vs encorvamiento) se estima por la posición de la cabeza frente a las caderas
+    dv = angle_from_vertical(trunk_vec)
+    sign = 1.0
+    if abs(ear_mid[0] - hip_mid[0]) > 0.02:
+        sign = -1.0 if ear_mid[0] > hip_mid[0] else 1.0
+    return max(60.0, min(110.0, 90.0 + sign * dv))
+
+
+def _line_tilt(vec: Point) -> float:
+    # Inclinación de una línea respecto a la horizontal en [0, 90], independiente del sentido
+    a = abs(math.degrees(math.atan2(vec[1], vec[0])))
+    return min(a, 180.0 - a)
+
+
+def _build_default_registry() -> MetricRegistry:
+    reg = MetricRegistry()
+    reg.add_intermediate("shoulder_mid", (_lm(LEFT_SHOULDER), _lm(RIGHT_SHOULDER)), midpoint)
+    reg.add_intermediate("hip_mid", (_lm(LEFT_HIP), _lm(RIGHT_HIP)), midpoint)
+    reg.add_intermediate("ear_mid", (_lm(LEFT_EAR), _lm(RIGHT_EAR)), midpoint)
+    reg.add_intermediate("neck_vec", ("shoulder_mid", "ear_mid"), vector)
+    reg.add_intermediate("trunk_vec", ("hip_mid", "shoulder_mid"), vector)
+    reg.add_intermediate("shoulder_vec", (_lm(LEFT_SHOULDER), _lm(RIGHT_SHOULDER)), vector)
+    reg.add_intermediate("ear_vec", (_lm(LEFT_EAR), _lm(RIGHT_EAR)), vector)
+    reg.add_intermediate("forearm_left", (_lm(LEFT_ELBOW), _lm(LEFT_WRIST)), vector)
+    reg.add_intermediate("forearm_right", (_lm(RIGHT_ELBOW), _lm(RIGHT_WRIST)), vector)
+    reg.add_intermediate("hand_left", (_lm(LEFT_WRIST), _lm(LEFT_INDEX)), vector)
+    reg.add_intermediate("hand_right", (_lm(RIGHT_WRIST), _lm(RIGHT_INDEX)), vector)
+    reg.add_intermediate(
+        "elbow_left", (_lm(LEFT_SHOULDER), _lm(LEFT_ELBOW), _lm(LEFT_WRIST)), joint_angle
+    )
+    reg.add_intermediate(
+        "elbow_right", (_lm(RIGHT_SHOULDER), _lm(RIGHT_ELBOW), _lm(RIGHT_WRIST)), joint_angle
+    )
+
+    reg.add_metric(Metric(
+        "neck_angle", ("neck_vec",), angle_from_vertical, "lower",
+        "Eleva la pantalla a la altura de los ojos y retrae la barbilla",
+    ))
+    reg.add_metric(Metric(
+        "back_angle", ("trunk_vec", "ear_mid", "hip_mid"), _back_angle, "higher",
+        "Apoya la zona lumbar y reclina el respaldo ligeramente (95°–110°)",
+    ))
+    reg.add_metric(Metric(
+        "elbow_angle", ("elbow_left", "elbow_right"), lambda a, b: (a + b) / 2.0, "deviation",
+        "Ajusta la altura de la silla o el reposabrazos para mantener 90° en codos",
+    ))
+    reg.add_metric(Metric(
+        "shoulder_alignment", ("shoulder_vec",), lambda v: abs(math.degrees(math.atan2(v[1], v[0]))), "lower",
+        "Relaja hombros y centra el teclado para evitar inclinación lateral",
+    ))
+    reg.add_metric(Metric(
+        "wrist_deviation",
+        ("forearm_left", "hand_left", "forearm_right", "hand_right"),
+        lambda fl, hl, fr, hr: (angle_between(fl, hl) + angle_between(fr, hr)) / 2.0,
+        "lower",
+        "Mantén las muñecas rectas y alineadas con el antebrazo; usa reposamuñecas",
+    ))
+    reg.add_metric(Metric(
+        "head_tilt", ("ear_vec",), _line_tilt, "lower",
+        "Endereza la cabeza y centra el monitor frente a ti",
+    ))
+    return reg
+
+
+DEFAULT_REGISTRY = _build_default_registry()
@@ -57,6 +57,8 @@ class PoseDetector:
         self._target_width = 640
         self._target_height = 360
         self._model_complexity = 1
+        self._min_detection_confidence = 0.5
+        self._min_tracking_confidence = 0.5
         self._fps_window: deque[float] = deque(maxlen=60)
         self._last_frame_ms: float = 0.0
         self._lighting_status: str = "unknown"
@@ -148,6 +150,34 @@ class PoseDetector:
             "lighting": self._lighting_status,
         }
 
+    def apply_config(self, changes: Dict[str, Any]) -> bool:
+        """Aplica cambios de configuración en caliente (claves `cv.*`).
+
+        La resolución se aplica sin tocar el modelo. El grafo de MediaPipe solo se reconstruye
+        si cambian sus parámetros de construcción (`model_complexity` o las confianzas mínimas)
+        respecto a los valores vigentes. Devuelve True si se reconstruyó el modelo.
+        """
+        width = changes.get("cv.target_width", self._target_width)
+        height = changes.get("cv.target_height", self._target_height)
+        if (width, height) != (self._target_width, self._target_height):
+            self._target_width = int(width)
+            self._target_height = int(height)
+            if self._capture is not None and cv2 is not None:
+                self._capture.set(cv2.CAP_PROP_FRAME_WIDTH, float(self._target_width))
+                self._capture.set(cv2.CAP_PROP_FRAME_HEIGHT, float(self._target_height))
+
+        model_params = (
+            int(changes.get("cv.model_complexity", self._model_complexity)),
+            float(changes.get("cv.min_detection_confidence", self._min_detection_confidence)),
+            float(changes.get("cv.min_tracking_confidence", self._min_tracking_confidence)),
+        )
+        current = (self._model_complexity, self._min_detection_confidence, self._min_tracking_confidence)
+        if model_params == current:
+            return False
+        self._model_complexity, self._min_detection_confidence, self._min_tracking_confidence = model_params
+        self._recreate_pose()
+        return self._mp_pose is not None
+
     def get_frame_rate(self) -> float:
         """FPS estimados con ventana de 1-2 segundos."""
         if not self._fps_window:
@@ -166,8 +196,8 @@ class PoseDetector:
         return self._mp_pose.Pose(
             model_complexity=model_complexity,
             enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
+            min_detection_confidence=self._min_detection_confidence,
+            min_tracking_confidence=self._min_tracking_confidence,
         )
 
     def _recreate_pose(self) -> None:
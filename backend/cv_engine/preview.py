@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover - dependencias externas
+    cv2 = None  # type: ignore
+
+
+# Conexiones del esqueleto (índices MediaPipe Pose): cara, tronco y extremidades
+SKELETON_CONNECTIONS: Tuple[Tuple[int, int], ...] = (
+    (7, 0), (0, 8),
+    (11, 12), (11, 23), (12, 24), (23, 24),
+    (11, 13), (13, 15), (12, 14), (14, 16),
+    (23, 25), (25, 27), (24, 26), (26, 28),
+)
+MIN_VISIBILITY = 0.5
+
+
+class PreviewBroadcaster:
+    """Vista previa MJPEG bajo demanda con codificación compartida.
+
+    - Sin espectadores `maybe_publish()` retorna de inmediato: cero trabajo extra en el bucle de CV.
+    - Con espectadores codifica como máximo un JPEG por frame y a `fps` como tope; todos los
+      espectadores reciben los mismos bytes (`latest()`).
+    - Resolución reducida (`width`) para abaratar el redimensionado y la codificación.
+
+    Ejemplo
+    -------
+    >>> preview = PreviewBroadcaster(width=320, fps=5.0)
+    >>> preview.maybe_publish(None, None, now=0.0)
+    False
+    """
+
+    def __init__(self, width: int = 320, fps: float = 5.0, jpeg_quality: int = 70) -> None:
+        self.width = width
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self._viewers = 0
+        self._seq = 0
+        self._jpeg: Optional[bytes] = None
+        self._last_encode = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def viewers(self) -> int:
+        return self._viewers
+
+    def configure(self, width: Optional[int] = None, fps: Optional[float] = None, jpeg_quality: Optional[int] = None) -> None:
+        if width is not None:
+            self.width = int(width)
+        if fps is not None:
+            self.fps = float(fps)
+        if jpeg_quality is not None:
+            self.jpeg_quality = int(jpeg_quality)
+
+    def add_viewer(self) -> None:
+        with self._lock:
+            self._viewers += 1
+
+    def remove_viewer(self) -> None:
+        with self._lock:
+            self._viewers = max(0, self._viewers - 1)
+            if self._viewers == 0:
+                # No retener imágenes en memoria sin espectadores
+                self._jpeg = None
+
+    def maybe_publish(self, frame_bgr: Any, detection: Optional[Dict[str, Any]], now: float) -> bool:
+        """Codifica y publica el frame si hay espectadores y toca por ritmo. Devuelve True si publicó."""
+        if self._viewers == 0:
+            return False
+        if self.fps > 0 and now - self._last_encode < 1.0 / self.fps:
+            return False
+        jpeg = self._encode(frame_bgr, detection)
+        if jpeg is None:
+            return False
+        with self._lock:
+            self._last_encode = now
+            self._seq += 1
+            self._jpeg = jpeg
+        return True
+
+    def latest(self) -> Tuple[int, Optional[bytes]]:
+        """Último JPEG publicado y su secuencia."""
+        with self._lock:
+            return self._seq, self._jpeg
+
+    # ------------------------ utilidades internas ------------------------
+    def _encode(self, frame_bgr: Any, detection: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        if cv2 is None or frame_bgr is None:
+            return None
+        h, w = frame_bgr.shape[:2]
+        if w > self.width:
+            scale = self.width / float(w)
+            frame = cv2.resize(frame_bgr, (self.width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame_bgr.copy()
+        landmarks = (detection or {}).get("landmarks")
+        if landmarks:
+            self._draw_skeleton(frame, landmarks)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        return buf.tobytes() if ok else None
+
+    def _draw_skeleton(self, frame: Any, landmarks: Any) -> None:
+        h, w = frame.shape[:2]
+        points = [
+            (int(lm["x"] * w), int(lm["y"] * h)) if lm.get("visibility", 1.0) >= MIN_VISIBILITY else None
+            for lm in landmarks
+        ]
+        for a, b in SKELETON_CONNECTIONS:
+            if a < len(points) and b < len(points) and points[a] and points[b]:
+                cv2.line(frame, points[a], points[b], (0, 200, 255), 2)
+        for p in points:
+            if p:
+                cv2.circle(frame, p, 3, (0, 255, 0), -1)
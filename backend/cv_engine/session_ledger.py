@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+
+# Puntuación 1-10 por severidad (misma escala que el dashboard)
+SEVERITY_SCORE: Dict[str, float] = {
+    "optimal": 9.5,
+    "acceptable": 8.0,
+    "warning": 6.0,
+    "critical": 3.0,
+}
+# Métricas que componen la puntuación global (cuello, espalda, brazos)
+SCORED_METRICS = ("neck_angle", "back_angle", "elbow_angle")
+
+
+class SessionLedger:
+    """Resumen incremental de una sesión en memoria constante.
+
+    Mantiene la media de puntuación postural, el número de alertas y las pausas detectadas
+    (ausencia de pose prolongada) actualizándolos en O(1) por análisis. El resumen se
+    persiste periódicamente (`checkpoint_due` / `mark_checkpoint`) para que un cierre
+    abrupto pierda como mucho un intervalo.
+
+    Ejemplo
+    -------
+    >>> ledger = SessionLedger(start_ts=0.0, break_min_s=60.0)
+    >>> ledger.observe({"severity_by_metric": {"neck_angle": "optimal"}}, now=1.0)
+    >>> ledger.summary()["average_posture_score"]
+    9.5
+    """
+
+    def __init__(self, start_ts: float, checkpoint_interval_s: float = 15.0, break_min_s: float = 60.0) -> None:
+        self.start_ts = start_ts
+        self.checkpoint_interval_s = checkpoint_interval_s
+        self.break_min_s = break_min_s
+        self.session_id: Optional[int] = None
+        self.last_ts = start_ts
+        self._scored = 0
+        self._mean_score = 0.0
+        self._alerts = 0
+        self._breaks = 0
+        self._no_pose_since: Optional[float] = None
+        self._break_counted = False
+        self._last_checkpoint = start_ts
+
+    def observe(self, analysis: Dict[str, Any], now: float, alerts_entered: int = 0) -> None:
+        """Incorpora un análisis. `alerts_entered` = eventos `enter` emitidos en este frame."""
+        self.last_ts = now
+        self._alerts += alerts_entered
+        sev = analysis.get("severity_by_metric")
+        if not sev:
+            if analysis.get("overall_severity") == "no_pose":
+                if self._no_pose_since is None:
+                    self._no_pose_since = now
+                elif not self._break_counted and now - self._no_pose_since >= self.break_min_s:
+                    self._breaks += 1
+                    self._break_counted = True
+            return
+
+        self._no_pose_since = None
+        self._break_counted = False
+        total = 0.0
+        count = 0
+        for metric in SCORED_METRICS:
+            score = SEVERITY_SCORE.get(sev.get(metric, ""))
+            if score is not None:
+                total += score
+                count += 1
+        if count:
+            self._scored += 1
+            self._mean_score += (total / count - self._mean_score) / self._scored
+
+    def checkpoint_due(self, now: float) -> bool:
+        return now - self._last_checkpoint >= self.checkpoint_interval_s
+
+    def mark_checkpoint(self, now: float, session_id: int) -> None:
+        self._last_checkpoint = now
+        self.session_id = session_id
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen actual; `average_posture_score` es `None` si aún no hubo pose."""
+        return {
+            "start_ts": self.start_ts,
+            "end_ts": self.last_ts,
+            "average_posture_score": round(self._mean_score, 2) if self._scored else None,
+            "alerts_triggered": self._alerts,
+            "breaks_taken": self._breaks,
+        }
@@ -1,11 +1,72 @@
 from __future__ import annotations
 
+import json
 import threading
 import time
-from typing import Any, Dict, Optional
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 from .pose_detector import PoseDetector
 from .ergonomic_analyzer import ErgonomicAnalyzer, ERGONOMIC_STANDARDS
+from .metric_registry import CORE_METRICS
+from .alert_engine import AlertEngine, AlertRules
+from .session_ledger import SessionLedger
+from .preview import PreviewBroadcaster
+from .landmark_recording import DEFAULT_RECORDINGS_DIR, LandmarkRecorder, purge_old_recordings, resolve_recordings_dir
+from ..models.db import MAX_HISTORY_DAYS, close_open_alerts, record_alert_events, to_db_timestamp, upsert_session_summary
+
+
+# Intervalo de escritura por lotes de eventos de alerta en `alert_history`
+ALERT_FLUSH_INTERVAL_S = 5.0
+# Campos que toda proyección `fields=` conserva para seguir la secuencia
+ALWAYS_INCLUDED_FIELDS = frozenset({"seq", "ts", "session_state"})
+# Operaciones asíncronas (start/stop/calibrate) consultables por id
+MAX_TRACKED_OPERATIONS = 64
+# Tiempo máximo en `warming` (cámara abierta sin entregar frames) antes de pasar a `failed`
+WARMUP_TIMEOUT_S = 10.0
+
+
+class EventChannel:
+    """Canal de eventos con secuencia monótona y buffer acotado.
+
+    Los consumidores (WebSocket `/api/cv/events`) piden los eventos posteriores a la última
+    secuencia vista; no hay trabajo por frame si no hay transiciones.
+
+    Ejemplo
+    -------
+    >>> ch = EventChannel()
+    >>> ch.publish([{"type": "enter"}])
+    1
+    >>> [e["seq"] for e in ch.since(0)]
+    [1]
+    """
+
+    def __init__(self, maxlen: int = 256) -> None:
+        self._events: deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, events: List[Dict[str, Any]]) -> int:
+        """Añade eventos asignándoles `seq`. Devuelve la última secuencia."""
+        with self._lock:
+            for ev in events:
+                self._seq += 1
+                ev["seq"] = self._seq
+                self._events.append(ev)
+            return self._seq
+
+    def since(self, seq: int) -> List[Dict[str, Any]]:
+        """Eventos con secuencia mayor que `seq` (los más antiguos pueden haberse descartado)."""
+        with self._lock:
+            if seq >= self._seq:
+                return []
+            return [ev for ev in self._events if ev["seq"] > seq]
 
 
 class CVSessionManager:
@@ -14,6 +75,12 @@ class CVSessionManager:
     - Inicia/detiene cámara y bucle de procesamiento a ~30fps.
     - Publica el último resultado de análisis para consumo por HTTP/WebSocket.
     - Maneja degradación graciosa y estados de error comunes.
+    - Evalúa alertas por métrica y publica solo transiciones en `events`, persistidas por lotes.
+    - Lleva el resumen incremental de la sesión (`SessionLedger`) con checkpoints en SQLite.
+    - Aplica cambios de configuración en caliente (`bind_config`) dentro del hilo de CV.
+    - Opcionalmente graba el flujo de landmarks (`recording.enabled`) para reproducirlo después.
+    - Ciclo de vida no bloqueante (`start_async` / `stop_async` / `calibrate_async`) con handles
+      de operación y estados `idle|opening|warming|running|stopping|failed` publicados en `events`.
     """
 
     def __init__(self) -> None:
@@ -24,68 +91,488 @@ class CVSessionManager:
         self._lock = threading.Lock()
         self._last_detection: Optional[Dict[str, Any]] = None
         self._last_analysis: Optional[Dict[str, Any]] = None
+        self._analysis_seq = 0
         self._last_error: Optional[str] = None
+        self.alerts = AlertEngine()
+        self.events = EventChannel()
+        self._pending_alert_events: List[Dict[str, Any]] = []
+        self._last_alert_flush = time.time()
+        self.ledger: Optional[SessionLedger] = None
+        self._target_fps = 30.0
+        self._checkpoint_interval_s = 15.0
+        self._break_min_s = 60.0
+        self._pending_config: Dict[str, Any] = {}
+        self.preview = PreviewBroadcaster()
+        self._recording_enabled = False
+        self._recording_dir = DEFAULT_RECORDINGS_DIR
+        self.recorder: Optional[LandmarkRecorder] = None
+        self._state = "idle"
+        self._operations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._start_op: Optional[Dict[str, Any]] = None
+        self._stop_op: Optional[Dict[str, Any]] = None
+        self._start_thread: Optional[threading.Thread] = None
+        self._stop_thread: Optional[threading.Thread] = None
+        self._calibration: Optional[Dict[str, Any]] = None
+        # Serializa apertura y cierre completos (start/stop, bloqueantes o asíncronos); `_lock`
+        # solo protege el estado y nunca se mantiene mientras se abre la cámara
+        self._lifecycle_lock = threading.Lock()
+        self._warming_deadline: Optional[float] = None
+        self._state_version = 0
+        # Distingue ETags entre reinicios del backend (la secuencia vuelve a 0)
+        self._boot_id = uuid.uuid4().hex[:8]
+        self._payload_cache_version: Tuple[int, int] = (-1, -1)
+        self._payload_cache: Dict[FrozenSet[str], Tuple[str, bytes]] = {}
+        # Checkpoints del ledger: versionan los contadores de sesión en el ETag de estado
+        self._checkpoint_seq = 0
+        # Callbacks sin argumentos invocados (fuera de `_lock`) tras cada análisis o cambio de estado
+        self._analysis_listeners: List[Callable[[], None]] = []
 
     # ------------------------- ciclo de vida -------------------------
     def start(self) -> bool:
-        """Inicia la sesión si no está corriendo. Devuelve True si queda activa."""
+        """Inicia la sesión si no está corriendo (bloqueante). Devuelve True si queda activa.
+
+        Si otra llamada ya está abriendo la cámara, espera a que termine en lugar de abrir otra.
+        """
+        with self._lifecycle_lock:
+            with self._lock:
+                if self._running:
+                    return True
+            return self._open_and_launch(None)
+
+    def start_async(self) -> Dict[str, Any]:
+        """Inicia la sesión en segundo plano y devuelve de inmediato el handle de la operación.
+
+        Las transiciones `opening` -> `warming` -> `running` (o `failed`) se publican como
+        eventos `session_state` en `events`.
+        """
         with self._lock:
+            pending = self._start_op
+            if pending is not None and pending["status"] == "pending":
+                return dict(pending)
+            op = self._new_op_locked("start")
             if self._running:
-                return True
-            opened = self.detector.start_camera()
-            if not opened:
+                self._finish_op_locked(op, result={"already_running": True})
+                return dict(op)
+            self._start_op = op
+            self._start_thread = threading.Thread(
+                target=self._start_worker, args=(op,), name="cv_start", daemon=True
+            )
+            self._start_thread.start()
+            return dict(op)
+
+    def stop(self, op: Optional[Dict[str, Any]] = None) -> None:
+        """Detiene la sesión y libera la cámara (bloqueante)."""
+        # Si hay una apertura de cámara en curso, se espera a que termine para no dejarla abierta
+        with self._lifecycle_lock:
+            self._set_state("stopping", op)
+            with self._lock:
+                self._running = False
+            self._teardown()
+            self._set_state("idle", op)
+
+    def _teardown(self) -> None:
+        # Libera cámara, alertas, calibración y fila de la sesión (con `_running` ya en False)
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        self.detector.stop_camera()
+        with self._lock:
+            self._thread = None
+            # Cerrar alertas abiertas para no dejarlas colgadas en el historial
+            closing = self.alerts.reset()
+            self._pending_alert_events.extend(closing)
+            if self._calibration is not None:
+                self._finish_op_locked(self._calibration["op"], error="session_stopped")
+                self._calibration = None
+            # Un start que no llegó a `running` queda cancelado
+            if self._start_op is not None and self._start_op["status"] == "pending":
+                self._finish_op_locked(self._start_op, error="stopped")
+        if closing:
+            self.events.publish(closing)
+        self._flush_alert_events()
+        # Cerrar la fila de la sesión con el resumen final
+        self._checkpoint_session(finalized=True)
+        with self._lock:
+            self.ledger = None
+            self._warming_deadline = None
+            self._close_recorder()
+
+    def stop_async(self) -> Dict[str, Any]:
+        """Detiene la sesión en segundo plano (`stopping` -> `idle`) y devuelve el handle."""
+        with self._lock:
+            pending = self._stop_op
+            if pending is not None and pending["status"] == "pending":
+                return dict(pending)
+            op = self._new_op_locked("stop")
+            self._stop_op = op
+            self._stop_thread = threading.Thread(target=self._stop_worker, args=(op,), name="cv_stop", daemon=True)
+            self._stop_thread.start()
+        return dict(op)
+
+    def calibrate_async(self, frames: int = 30, timeout_s: float = 10.0) -> Dict[str, Any]:
+        """Calibra promediando `frames` análisis nuevos con pose, recogidos por el bucle de CV.
+
+        Devuelve el handle de inmediato; al completarse se publica un evento `calibration`.
+        """
+        with self._lock:
+            op = self._new_op_locked("calibrate")
+            if not self._running:
+                self._finish_op_locked(op, error="not_running")
+                return dict(op)
+            if self._calibration is not None:
+                self._finish_op_locked(self._calibration["op"], error="superseded")
+            self._calibration = {
+                "op": op,
+                "frames": max(1, int(frames)),
+                "count": 0,
+                "sums": {},
+                "deadline": time.time() + timeout_s,
+            }
+            return dict(op)
+
+    def get_operation(self, op_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            op = self._operations.get(op_id)
+            return dict(op) if op is not None else None
+
+    def _open_and_launch(self, op: Optional[Dict[str, Any]]) -> bool:
+        # Llamar con `_lifecycle_lock` tomado
+        self._set_state("opening", op)
+        # Fuera del lock: abrir algunas cámaras USB tarda segundos
+        opened = self.detector.start_camera()
+        if not opened:
+            with self._lock:
                 self._last_error = "camera_open_failed"
                 self._running = False
-                return False
+                self._set_state_locked("failed")
+                if op is not None:
+                    self._finish_op_locked(op, error="camera_open_failed")
+            self._publish_state("failed", op, reason="camera_open_failed")
+            return False
+        self._set_state("warming", op)
+        try:
+            # Episodios que quedaron abiertos por un cierre abrupto no deben mezclarse con esta sesión
+            close_open_alerts()
+        except Exception as exc:  # pragma: no cover - errores de disco/bloqueo
+            with self._lock:
+                self._last_error = f"alert_history_close_failed: {exc}"
+        with self._lock:
+            self.ledger = SessionLedger(time.time(), self._checkpoint_interval_s, self._break_min_s)
+        # La fila de la sesión existe desde el inicio (`finalized = 0` hasta `stop()`)
+        self._checkpoint_session()
+        if self._recording_enabled:
+            self._purge_recordings()
+        with self._lock:
             self._running = True
+            self._warming_deadline = time.time() + WARMUP_TIMEOUT_S
+            if self._recording_enabled:
+                self._open_recorder()
             self._thread = threading.Thread(target=self._loop, name="cv_loop", daemon=True)
             self._thread.start()
-            return True
+        return True
 
-    def stop(self) -> None:
-        """Detiene la sesión y libera la cámara."""
+    def _start_worker(self, op: Dict[str, Any]) -> None:
+        # Un stop en curso debe terminar antes de volver a abrir la cámara
+        stop_thread = self._stop_thread
+        if stop_thread is not None and stop_thread.is_alive():
+            stop_thread.join(timeout=10.0)
+        with self._lifecycle_lock:
+            with self._lock:
+                # Un stop que tomó el cerrojo antes ya falló la operación (`stopped`): no abrir
+                if op["status"] != "pending":
+                    return
+                # Un `start()` bloqueante concurrente pudo abrir la cámara mientras esperábamos
+                if self._running:
+                    if op["status"] == "pending":
+                        self._finish_op_locked(op, result={"already_running": True})
+                    return
+            self._open_and_launch(op)
+
+    def _stop_worker(self, op: Dict[str, Any]) -> None:
+        self.stop(op)
         with self._lock:
-            self._running = False
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=1.0)
-        self.detector.stop_camera()
+            self._finish_op_locked(op, result={"stopped": True})
+
+    def _set_state(self, state: str, op: Optional[Dict[str, Any]] = None, **extra: Any) -> None:
         with self._lock:
-            self._thread = None
+            self._set_state_locked(state)
+        self._publish_state(state, op, **extra)
+
+    def _set_state_locked(self, state: str) -> None:
+        self._state = state
+        self._state_version += 1
+
+    def _publish_state(self, state: str, op: Optional[Dict[str, Any]] = None, **extra: Any) -> None:
+        self.events.publish([{
+            "type": "session_state",
+            "state": state,
+            "ts": time.time(),
+            "op_id": op["id"] if op else None,
+            **extra,
+        }])
+        self._notify_analysis()
+
+    def _new_op_locked(self, kind: str) -> Dict[str, Any]:
+        op = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "status": "pending",
+            "created_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self._operations[op["id"]] = op
+        while len(self._operations) > MAX_TRACKED_OPERATIONS:
+            self._operations.popitem(last=False)
+        return op
+
+    def _finish_op_locked(self, op: Dict[str, Any], result: Any = None, error: Optional[str] = None) -> None:
+        op.update({
+            "status": "failed" if error else "done",
+            "finished_at": time.time(),
+            "result": result,
+            "error": error,
+        })
+
+    def _collect_calibration_locked(self, analysis: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+        # Acumula ángulos de un análisis nuevo; devuelve el evento a publicar si terminó
+        cal = self._calibration
+        if cal is None:
+            return None
+        angles = analysis.get("angles")
+        if angles:
+            for key, value in angles.items():
+                cal["sums"][key] = cal["sums"].get(key, 0.0) + value
+            cal["count"] += 1
+        if cal["count"] < cal["frames"]:
+            return None
+        baseline = {k: round(v / cal["count"], 2) for k, v in cal["sums"].items()}
+        self.analyzer.calibrate(baseline)
+        self._finish_op_locked(cal["op"], result={"baseline": baseline, "frames": cal["count"]})
+        return self._end_calibration_locked(now)
+
+    def _expire_calibration_locked(self, now: float) -> Optional[Dict[str, Any]]:
+        # Se comprueba en cada iteración del bucle, también cuando la cámara no entrega frames
+        cal = self._calibration
+        if cal is None or now <= cal["deadline"]:
+            return None
+        self._finish_op_locked(cal["op"], error="timeout")
+        return self._end_calibration_locked(now)
+
+    def _end_calibration_locked(self, now: float) -> Dict[str, Any]:
+        op = self._calibration["op"]
+        self._calibration = None
+        return {"type": "calibration", "status": op["status"], "op_id": op["id"], "ts": now, "error": op["error"]}
+
+    # ------------------------- configuración -------------------------
+    def bind_config(self, store: Any) -> None:
+        """Suscribe la sesión a un `ConfigStore` y aplica su estado actual."""
+        store.subscribe(self._on_config_change)
+        self._on_config_change(store.snapshot()["values"], store.version)
+
+    def _on_config_change(self, changes: Dict[str, Any], version: int) -> None:
+        # Los cambios se encolan y los aplica el hilo de CV entre frames para no reconstruir
+        # el modelo mientras `process_frame` lo está usando.
+        with self._lock:
+            self._pending_config.update(changes)
+            running = self._running
+        if not running:
+            self._apply_pending_config()
+
+    def _apply_pending_config(self) -> None:
+        with self._lock:
+            changes, self._pending_config = self._pending_config, {}
+        if not changes:
+            return
+        if changes.get("recording.enabled"):
+            self._purge_recordings()
+        self.detector.apply_config(changes)
+        if "ergonomic.standards" in changes:
+            self.analyzer.set_standards(changes["ergonomic.standards"])
+        if "ergonomic.extra_metrics" in changes:
+            # Las métricas base se mantienen siempre: alertas y resumen de sesión dependen de ellas
+            extra = [m for m in changes["ergonomic.extra_metrics"] if m not in CORE_METRICS]
+            self.analyzer.set_metrics(CORE_METRICS + tuple(extra))
+        self.preview.configure(
+            width=changes.get("preview.width"),
+            fps=changes.get("preview.fps"),
+            jpeg_quality=changes.get("preview.jpeg_quality"),
+        )
+        with self._lock:
+            self._target_fps = float(changes.get("cv.target_fps", self._target_fps))
+            rules: AlertRules = self.alerts.rules
+            for field_name in ("debounce_s", "escalate_s", "clear_s", "cooldown_s"):
+                key = f"alerts.{field_name}"
+                if key in changes:
+                    setattr(rules, field_name, float(changes[key]))
+            self._checkpoint_interval_s = float(changes.get("session.checkpoint_interval_s", self._checkpoint_interval_s))
+            self._break_min_s = float(changes.get("session.break_min_s", self._break_min_s))
+            if self.ledger is not None:
+                self.ledger.checkpoint_interval_s = self._checkpoint_interval_s
+                self.ledger.break_min_s = self._break_min_s
+            if "recording.dir" in changes:
+                self._recording_dir = resolve_recordings_dir(changes["recording.dir"])
+            if "recording.enabled" in changes:
+                self._recording_enabled = bool(changes["recording.enabled"])
+                if not self._recording_enabled:
+                    self._close_recorder()
+                elif self._running and self.recorder is None:
+                    self._open_recorder()
 
     # --------------------------- consultas ---------------------------
     def get_status(self) -> Dict[str, Any]:
         with self._lock:
-            status = {
-                "running": self._running,
-                "fps": round(self.detector.get_frame_rate(), 2),
-                "last_error": self._last_error,
-            }
-        return status
+            return self._status_locked()
+
+    def get_status_payload(self, if_none_match: Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        """Estado serializado y su ETag débil (`W/"..."`); `body` es None si `if_none_match` coincide.
+
+        El ETag cambia con el estado de sesión, las transiciones publicadas en `events`, cada
+        checkpoint del ledger y `last_error`. `fps` y los contadores de sesión entre checkpoints
+        no lo invalidan: por eso es débil (representaciones equivalentes, no idénticas). Un
+        cliente con ETag vigente recibe `304` y conserva `fps` y contadores de hasta un
+        intervalo de checkpoint de antigüedad; un GET sin `If-None-Match` los devuelve al día.
+        """
+        with self._lock:
+            error_tag = format(zlib.crc32((self._last_error or "").encode()), "08x")
+            etag = (
+                f'W/"{self._boot_id}-{self._state_version}-{self.events.last_seq}'
+                f'-{self._checkpoint_seq}-{error_tag}"'
+            )
+            if if_none_match == etag:
+                return etag, None
+            status = self._status_locked()
+        return etag, json.dumps(status, separators=(",", ":")).encode("utf-8")
+
+    def _status_locked(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "state": self._state,
+            "fps": round(self.detector.get_frame_rate(), 2),
+            "last_error": self._last_error,
+            "active_alerts": self.alerts.active_alerts(),
+            "session": self.ledger.summary() if self.ledger else None,
+        }
+
+    def subscribe_analysis(self, listener: Callable[[], None]) -> None:
+        """Registra un callback invocado desde el hilo de CV tras cada análisis o cambio de estado.
+
+        Debe ser rápido y no bloquear (p. ej. `loop.call_soon_threadsafe`); sirve para despertar
+        long-polls sin sondeo.
+        """
+        with self._lock:
+            self._analysis_listeners.append(listener)
+
+    def _notify_analysis(self) -> None:
+        for listener in list(self._analysis_listeners):
+            try:
+                listener()
+            except Exception:  # pragma: no cover - un listener roto no detiene el bucle
+                pass
 
     def get_current_analysis(self) -> Dict[str, Any]:
         with self._lock:
-            analysis = self._last_analysis.copy() if self._last_analysis else {
-                "overall_severity": "idle",
-                "message": "Sin análisis disponible",
-            }
-            if self._last_detection:
-                analysis.update({
-                    "inference_ms": self._last_detection.get("inference_ms"),
-                    "lighting": self._last_detection.get("lighting"),
-                    "image_size": self._last_detection.get("image_size"),
-                    # Incluir landmarks para que el frontend pueda dibujar el esqueleto
-                    "landmarks": self._last_detection.get("landmarks"),
-                })
+            return self._current_analysis_locked()
+
+    def analysis_version(self) -> Tuple[int, int]:
+        """Versión del payload de análisis: (secuencia de análisis, versión de estado de sesión)."""
+        return self._analysis_seq, self._state_version
+
+    def get_current_analysis_payload(self, fields: Optional[FrozenSet[str]] = None) -> Tuple[str, bytes]:
+        """Payload JSON serializado y su ETag basado en secuencia, con caché por versión.
+
+        Entre dos análisis, las llamadas repetidas (por proyección `fields`) devuelven los mismos
+        bytes sin reconstruir ni re-serializar el payload. `seq`, `ts` y `session_state` se
+        incluyen siempre en las proyecciones.
+        """
+        key = fields or frozenset()
+        with self._lock:
+            version = (self._analysis_seq, self._state_version)
+            if self._payload_cache_version != version:
+                self._payload_cache_version = version
+                self._payload_cache = {}
+            cached = self._payload_cache.get(key)
+            if cached is not None:
+                return cached
+            analysis = self._current_analysis_locked()
+        if fields:
+            analysis = {k: v for k, v in analysis.items() if k in fields or k in ALWAYS_INCLUDED_FIELDS}
+        body = json.dumps(analysis, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        fields_tag = "all" if not fields else format(zlib.crc32(",".join(sorted(fields)).encode()), "08x")
+        etag = f'"{self._boot_id}-{version[0]}-{version[1]}-{fields_tag}"'
+        with self._lock:
+            if self._payload_cache_version == version:
+                self._payload_cache[key] = (etag, body)
+        return etag, body
+
+    def _current_analysis_locked(self) -> Dict[str, Any]:
+        analysis = self._last_analysis.copy() if self._last_analysis else {
+            "overall_severity": "idle",
+            "message": "Sin análisis disponible",
+        }
+        if self._last_detection:
+            analysis.update({
+                "inference_ms": self._last_detection.get("inference_ms"),
+                "lighting": self._last_detection.get("lighting"),
+                "image_size": self._last_detection.get("image_size"),
+                # Incluir landmarks para que el frontend pueda dibujar el esqueleto
+                "landmarks": self._last_detection.get("landmarks"),
+            })
+        analysis["session_state"] = self._state
         return analysis
 
     # ------------------------ bucle de procesamiento ------------------------
     def _loop(self) -> None:
-        target_fps = 30.0
-        target_dt = 1.0 / target_fps
+        try:
+            self._run_loop()
+        except Exception as exc:
+            # No dejar la sesión aparentando `running` con el hilo muerto
+            self._fail_session("cv_loop_failed", f"cv_loop_failed: {exc}")
+
+    def _fail_session(self, reason: str, error: str) -> None:
+        # Cierre desde el hilo de CV: misma limpieza que `stop()` pero terminando en `failed`
+        with self._lock:
+            if not self._running:
+                return  # un stop() ya está en curso
+            self._running = False
+            self._last_error = error
+            # Estado y operación cambian juntos: quien vea la operación fallida ve `failed`
+            self._set_state_locked("failed")
+            start_op = self._start_op
+            if start_op is not None and start_op["status"] == "pending":
+                self._finish_op_locked(start_op, error=reason)
+            else:
+                start_op = None
+        self._teardown()
+        self._publish_state("failed", start_op, reason=reason)
+
+    def _run_loop(self) -> None:
         while True:
+            now = time.time()
             with self._lock:
                 if not self._running:
                     break
+                has_config = bool(self._pending_config)
+                warmup_expired = (
+                    self._state == "warming"
+                    and self._warming_deadline is not None
+                    and now > self._warming_deadline
+                )
+                expired_calibration = self._expire_calibration_locked(now)
+            if expired_calibration is not None:
+                self.events.publish([expired_calibration])
+            if warmup_expired:
+                self._fail_session("warmup_timeout", "warmup_timeout: camera opened but delivered no frames")
+                return
+            if has_config:
+                try:
+                    self._apply_pending_config()
+                except Exception as exc:
+                    # Un cambio que no se puede aplicar no detiene el análisis
+                    with self._lock:
+                        self._last_error = f"config_apply_failed: {exc}"
+            target_dt = 1.0 / max(self._target_fps, 1.0)
             ok, frame = self.detector.read()
             if not ok or frame is None:
                 # Cámara no entrega frames; intentar mantener bajo uso de CPU
@@ -93,19 +580,117 @@ class CVSessionManager:
                 continue
 
             detection = self.detector.process_frame(frame)
+            now = time.time()
+            # Sin espectadores es una comparación de enteros; con ellos, un JPEG compartido
+            self.preview.maybe_publish(frame, detection, now)
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.append(now, detection.get("landmarks") if detection else None)
             with self._lock:
                 self._last_detection = detection
                 if detection is None:
                     self._last_analysis = {"overall_severity": "no_pose"}
                 else:
                     self._last_analysis = self.analyzer.analyze_pose(detection)
+                # Secuencia y momento del análisis: permiten medir latencia y detectar cambios
+                self._analysis_seq += 1
+                self._last_analysis["seq"] = self._analysis_seq
+                self._last_analysis["ts"] = now
+                alert_events = self.alerts.update(self._last_analysis.get("severity_by_metric"), now)
+                if alert_events:
+                    self._pending_alert_events.extend(alert_events)
+                ledger = self.ledger
+                if ledger is not None:
+                    entered = sum(1 for ev in alert_events if ev["type"] == "enter")
+                    ledger.observe(self._last_analysis, now, entered)
+                calibration_event = self._collect_calibration_locked(self._last_analysis, now)
+                start_op = None
+                warming = self._state == "warming"
+                if warming and self._start_op is not None and self._start_op["status"] == "pending":
+                    start_op = self._start_op
+                    self._finish_op_locked(start_op, result={"started": True})
+            if warming:
+                # Primer frame procesado: la cámara ya entrega imágenes
+                self._set_state("running", start_op)
+            else:
+                self._notify_analysis()
+            if alert_events:
+                self.events.publish(alert_events)
+            if calibration_event is not None:
+                self.events.publish([calibration_event])
+            if now - self._last_alert_flush >= ALERT_FLUSH_INTERVAL_S:
+                self._flush_alert_events()
+            if ledger is not None and ledger.checkpoint_due(now):
+                self._checkpoint_session()
 
-            # Mantener ritmo de 30fps
+            # Mantener ritmo objetivo (`cv.target_fps`, 30fps por defecto)
             elapsed = self.detector._last_frame_ms / 1000.0 if detection else 0.0
             sleep_time = max(0.0, target_dt - elapsed)
             if sleep_time > 0:
                 time.sleep(sleep_time)
 
+    def _flush_alert_events(self) -> None:
+        with self._lock:
+            pending, self._pending_alert_events = self._pending_alert_events, []
+            self._last_alert_flush = time.time()
+        if not pending:
+            return
+        try:
+            record_alert_events(pending)
+        except Exception as exc:  # pragma: no cover - errores de disco/bloqueo
+            # Reintentar en el siguiente lote sin perder eventos
+            with self._lock:
+                self._pending_alert_events[:0] = pending
+                self._last_error = f"alert_history_write_failed: {exc}"
+
+    def _purge_recordings(self) -> None:
+        # Sin `_lock`: recorre y borra ficheros; retención también sin reiniciar el backend
+        try:
+            purge_old_recordings(MAX_HISTORY_DAYS)
+        except OSError as exc:  # pragma: no cover - errores de disco/permisos
+            with self._lock:
+                self._last_error = f"recording_purge_failed: {exc}"
+
+    def _open_recorder(self) -> None:
+        # Llamar con `_lock` tomado (y `_purge_recordings()` antes, fuera del lock)
+        name = time.strftime("session-%Y%m%d-%H%M%S.erglm", time.localtime())
+        try:
+            self.recorder = LandmarkRecorder(self._recording_dir / name)
+        except OSError as exc:
+            self.recorder = None
+            self._last_error = f"recording_open_failed: {exc}"
+
+    def _close_recorder(self) -> None:
+        # Llamar con `_lock` tomado
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _checkpoint_session(self, finalized: bool = False) -> None:
+        with self._lock:
+            ledger = self.ledger
+            if ledger is None:
+                return
+            summary = ledger.summary()
+            session_id = ledger.session_id
+        try:
+            session_id = upsert_session_summary(
+                session_id,
+                to_db_timestamp(summary["start_ts"]),
+                to_db_timestamp(summary["end_ts"]),
+                summary["average_posture_score"],
+                summary["alerts_triggered"],
+                summary["breaks_taken"],
+                finalized=finalized,
+            )
+        except Exception as exc:  # pragma: no cover - errores de disco/bloqueo
+            with self._lock:
+                self._last_error = f"session_checkpoint_failed: {exc}"
+            return
+        ledger.mark_checkpoint(time.time(), session_id)
+        with self._lock:
+            self._checkpoint_seq += 1
+
 
 # Instancia global única para el backend
 cv_session = CVSessionManager()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SyntheticPoseDetector:
+    """Sustituto de `PoseDetector` sin cámara ni MediaPipe, para pruebas de carga.
+
+    Expone la misma interfaz que usa `CVSessionManager` (`start_camera`, `read`,
+    `process_frame`, `get_frame_rate`, `apply_config`, `stop_camera`, `_last_frame_ms`).
+    Genera una pose que oscila lentamente entre postura correcta y cuello adelantado para
+    producir también transiciones de alerta, y simula `inference_ms` de coste de CPU.
+
+    Ejemplo
+    -------
+    >>> det = SyntheticPoseDetector(inference_ms=0.0)
+    >>> det.start_camera()
+    True
+    >>> ok, frame = det.read()
+    >>> len(det.process_frame(frame)["landmarks"])
+    33
+    """
+
+    def __init__(self, inference_ms: float = 8.0, period_s: float = 20.0, busy: bool = True) -> None:
+        self.inference_ms = inference_ms
+        self.period_s = period_s
+        # busy=True consume CPU como la inferencia real; False solo duerme
+        self.busy = busy
+        self._open = False
+        self._frame = 0
+        self._fps_window: deque[float] = deque(maxlen=60)
+        self._last_frame_ms: float = 0.0
+
+    def start_camera(self, index: int = 0) -> bool:
+        self._open = True
+        return True
+
+    def stop_camera(self) -> None:
+        self._open = False
+        self._fps_window.clear()
+
+    def read(self) -> Tuple[bool, Optional[Any]]:
+        if not self._open:
+            return False, None
+        self._frame += 1
+        return True, self._frame
+
+    def apply_config(self, changes: Dict[str, Any]) -> bool:
+        return False
+
+    def process_frame(self, frame: Any) -> Optional[Dict[str, Any]]:
+        start_t = time.perf_counter()
+        landmarks = self._landmarks(time.time())
+        deadline = start_t + self.inference_ms / 1000.0
+        if self.busy:
+            while time.perf_counter() < deadline:
+                pass
+        else:
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+        self._last_frame_ms = (time.perf_counter() - start_t) * 1000.0
+        self._fps_window.append(time.perf_counter())
+        return {
+            "landmarks": landmarks,
+            "image_size": {"w": 640, "h": 360},
+            "inference_ms": round(self._last_frame_ms, 2),
+            "lighting": "good",
+        }
+
+    def get_frame_rate(self) -> float:
+        if len(self._fps_window) < 2:
+            return 0.0
+        duration = self._fps_window[-1] - self._fps_window[0]
+        return (len(self._fps_window) - 1) / duration if duration > 0 else 0.0
+
+    def _landmarks(self, now: float) -> List[Dict[str, float]]:
+        lean = 0.5 + 0.5 * math.sin(2 * math.pi * now / self.period_s)  # 0..1
+        lms = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+        ear_dx = 0.12 * lean  # cabeza adelantada
+        lms[7] = {"x": 0.48 + ear_dx, "y": 0.45, "z": 0.0, "visibility": 1.0}
+        lms[8] = {"x": 0.52 + ear_dx, "y": 0.45, "z": 0.0, "visibility": 1.0}
+        lms[11] = {"x": 0.45, "y": 0.55, "z": 0.0, "visibility": 1.0}
+        lms[12] = {"x": 0.55, "y": 0.55, "z": 0.0, "visibility": 1.0}
+        lms[13] = {"x": 0.42, "y": 0.62, "z": 0.0, "visibility": 1.0}
+        lms[14] = {"x": 0.58, "y": 0.62, "z": 0.0, "visibility": 1.0}
+        lms[15] = {"x": 0.48, "y": 0.64, "z": 0.0, "visibility": 1.0}
+        lms[16] = {"x": 0.52, "y": 0.64, "z": 0.0, "visibility": 1.0}
+        lms[23] = {"x": 0.47, "y": 0.75, "z": 0.0, "visibility": 1.0}
+        lms[24] = {"x": 0.53, "y": 0.75, "z": 0.0, "visibility": 1.0}
+        return lms
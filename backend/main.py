@@ -1,20 +1,54 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import asyncio
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import os
+import secrets
+from typing import Optional
 from .models.db import (
+    EXPORT_TABLES,
+    MAX_HISTORY_DAYS,
+    close_open_alerts,
     init_db,
-    get_settings as db_get_settings,
     update_settings as db_update_settings,
     purge_old_data,
 )
+from .models.config_store import LOCAL_ONLY_KEYS, runtime_config
+from .models.export import EXPORT_FORMATS, export_filename, stream_export
+from .models.ingest import MAX_BATCH_BYTES, ingest_batch
 from .cv_engine.session_manager import cv_session
+from .cv_engine.landmark_recording import purge_old_recordings
 
 APP_VERSION = os.environ.get("APP_VERSION", "0.1.0")
 
 app = FastAPI(title="Ergonomic App Backend", version=APP_VERSION)
 
+# Token por arranque compartido con Electron (o una CLI local) vía entorno. Protege las claves
+# `LOCAL_ONLY_KEYS` y la vista previa: cualquier web abierta en el navegador puede llamar a
+# 127.0.0.1, pero no conoce el token.
+LOCAL_TOKEN = os.environ.get("ERGONOMIC_LOCAL_TOKEN") or secrets.token_urlsafe(32)
+# Rutas con imágenes en crudo: nunca con cabeceras CORS
+CORS_EXCLUDED_PATHS = frozenset({"/api/cv/preview"})
+
+
+def _has_local_token(request: Request) -> bool:
+    token = request.headers.get("x-local-token") or request.query_params.get("token") or ""
+    return secrets.compare_digest(token.encode(), LOCAL_TOKEN.encode())
+
+
+class _CORSMiddleware(CORSMiddleware):
+    """CORS abierto salvo en `CORS_EXCLUDED_PATHS`, que pasan sin cabeceras CORS."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in CORS_EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app.add_middleware(
-    CORSMiddleware,
+    _CORSMiddleware,
     allow_origins=["*"],  # Solo desarrollo; en producción restringir
     allow_credentials=True,
     allow_methods=["*"],
@@ -22,12 +56,55 @@ app.add_middleware(
 )
 
 
+class _AnalysisSignal:
+    """Despierta a los long-polls cuando el hilo de CV publica un análisis o cambia de estado.
+
+    El hilo de CV no toca el bucle de asyncio: programa `_fire` con `call_soon_threadsafe`, que
+    libera a todos los que esperan el `Event` actual y lo sustituye por uno nuevo.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def current(self) -> asyncio.Event:
+        if self._event is None:
+            self.bind(asyncio.get_running_loop())
+        return self._event
+
+    def notify_threadsafe(self) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._fire)
+
+    def _fire(self) -> None:
+        event, self._event = self._event, asyncio.Event()
+        if event is not None:
+            event.set()
+
+
+analysis_signal = _AnalysisSignal()
+cv_session.subscribe_analysis(analysis_signal.notify_threadsafe)
+
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
+    # Los long-polls esperan en el bucle de eventos del servidor
+    analysis_signal.bind(asyncio.get_running_loop())
     init_db()
-    # Política de retención: borrar datos antiguos
+    # Alertas abiertas por un cierre abrupto del proceso anterior
+    close_open_alerts()
+    # Configuración en memoria: una sola lectura de SQLite; los cambios se aplican en caliente
+    runtime_config.load()
+    cv_session.bind_config(runtime_config)
+    # Política de retención: borrar datos antiguos (historial y grabaciones de landmarks)
     try:
-        purge_old_data(30)
+        purge_old_data(MAX_HISTORY_DAYS)
+        purge_old_recordings(MAX_HISTORY_DAYS)
     except Exception:
         pass
 
@@ -39,57 +116,213 @@ def health():
 
 # ---------------------- Endpoints de visión por computador ----------------------
 
-@app.post("/api/cv/start-session")
+@app.post("/api/cv/start-session", status_code=202)
 def start_session():
-    started = cv_session.start()
-    return {"started": started, **cv_session.get_status()}
+    # No bloquea: abrir la cámara ocurre en segundo plano (estados por `/api/cv/events`)
+    operation = cv_session.start_async()
+    return {"operation": operation, **cv_session.get_status()}
 
 
-@app.post("/api/cv/stop-session")
+@app.post("/api/cv/stop-session", status_code=202)
 def stop_session():
-    cv_session.stop()
-    return {"stopped": True, **cv_session.get_status()}
+    operation = cv_session.stop_async()
+    return {"operation": operation, **cv_session.get_status()}
+
+
+@app.get("/api/cv/operations/{op_id}")
+def get_operation(op_id: str):
+    operation = cv_session.get_operation(op_id)
+    if operation is None:
+        return JSONResponse({"ok": False, "reason": "unknown_operation"}, status_code=404)
+    return operation
+
+
+# Tope del long-poll para no retener conexiones indefinidamente
+MAX_LONG_POLL_S = 30.0
 
 
 @app.get("/api/cv/current-analysis")
-def current_analysis():
-    return cv_session.get_current_analysis()
+async def current_analysis(request: Request, fields: Optional[str] = None, wait: float = 0.0):
+    """Último análisis con ETag por secuencia.
+
+    - `If-None-Match` igual al ETag actual -> `304 Not Modified`.
+    - `wait=<s>` junto a `If-None-Match`: long-poll hasta el siguiente análisis nuevo
+      (o `304` al agotar el tiempo).
+    - `fields=angles,severity_by_metric`: proyección (p. ej. sin `landmarks`).
+    """
+    field_set = frozenset(f.strip() for f in fields.split(",") if f.strip()) if fields else None
+    if_none_match = request.headers.get("if-none-match")
+    # Tomar el Event antes de construir el payload: cualquier análisis posterior lo libera
+    event = analysis_signal.current()
+    etag, body = cv_session.get_current_analysis_payload(field_set)
+    if wait > 0 and if_none_match == etag:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait, MAX_LONG_POLL_S)
+        while if_none_match == etag:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            event = analysis_signal.current()
+            etag, body = cv_session.get_current_analysis_payload(field_set)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/api/cv/camera-status")
-def camera_status():
-    return cv_session.get_status()
+def camera_status(request: Request):
+    """Estado de la sesión con ETag débil versionado (estado, transiciones, checkpoints y error).
+
+    `fps` y los contadores de sesión entre checkpoints no cambian el ETag: un sondeo con
+    `If-None-Match` vigente responde `304` sin serializar el estado, y esos campos pueden
+    quedar desfasados hasta un intervalo de checkpoint (`session.checkpoint_interval_s`).
+    """
+    etag, body = cv_session.get_status_payload(request.headers.get("if-none-match"))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-@app.post("/api/cv/calibrate")
-def calibrate():
-    # Usa el último análisis disponible como baseline si contiene ángulos
-    data = cv_session.get_current_analysis()
-    angles = data.get("angles")
-    if angles:
-        cv_session.analyzer.calibrate(angles)
-        return {"ok": True, "baseline": angles}
-    return {"ok": False, "reason": "no_angles"}
+@app.post("/api/cv/calibrate", status_code=202)
+def calibrate(frames: int = 30, timeout_s: float = 10.0):
+    # Promedia `frames` análisis nuevos recogidos por el bucle de CV; resultado en la operación
+    operation = cv_session.calibrate_async(frames, timeout_s)
+    return {"operation": operation}
 
 
 @app.get("/api/cv/settings")
 def get_settings():
-    return db_get_settings()
+    return _settings_view()
 
 
 @app.post("/api/cv/settings")
 def set_settings(settings: dict):
     autostart = bool(settings.get("autostart", False))
     notifications = bool(settings.get("notifications", True))
+    runtime_config.update({"autostart": autostart, "notifications": notifications})
+    # Mantener la tabla legada sincronizada para lectores existentes
     db_update_settings(autostart, notifications)
-    return {"ok": True, "settings": db_get_settings()}
+    return {"ok": True, "settings": _settings_view()}
+
+
+def _settings_view() -> dict:
+    return {"autostart": runtime_config.get("autostart"), "notifications": runtime_config.get("notifications")}
+
+
+@app.get("/api/config")
+def get_config():
+    return runtime_config.snapshot()
+
+
+@app.post("/api/config")
+def set_config(changes: dict, request: Request):
+    local_only = sorted(LOCAL_ONLY_KEYS.intersection(changes))
+    if local_only and not _has_local_token(request):
+        return JSONResponse({"ok": False, "reason": f"local_token_required: {local_only}"}, status_code=403)
+    try:
+        changed = runtime_config.update(changes)
+    except (ValueError, TypeError) as exc:
+        return {"ok": False, "reason": str(exc)}
+    return {"ok": True, "version": runtime_config.version, "changed": changed}
+
+
+@app.get("/api/cv/preview")
+def preview_stream(request: Request):
+    """Vista previa MJPEG (frame procesado + esqueleto) para soporte. Desactivada por defecto.
+
+    La imagen se codifica una sola vez por frame y solo mientras haya espectadores; no se
+    almacena en disco. Requiere el token local (`X-Local-Token` o `?token=`) y no lleva CORS.
+    """
+    if not _has_local_token(request):
+        return JSONResponse({"ok": False, "reason": "local_token_required"}, status_code=403)
+    if not runtime_config.get("preview.enabled"):
+        return JSONResponse({"ok": False, "reason": "preview_disabled"}, status_code=404)
+    return StreamingResponse(
+        _mjpeg_frames(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+async def _mjpeg_frames():
+    preview = cv_session.preview
+    preview.add_viewer()
+    try:
+        seen = -1
+        while runtime_config.get("preview.enabled"):
+            seq, jpeg = preview.latest()
+            if jpeg is not None and seq != seen:
+                seen = seq
+                yield (
+                    b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                    + str(len(jpeg)).encode()
+                    + b"\r\n\r\n"
+                    + jpeg
+                    + b"\r\n"
+                )
+            await asyncio_sleep(0.5 / max(preview.fps, 1.0))
+    finally:
+        preview.remove_viewer()
+
+
+@app.get("/api/export/{table}")
+def export_table(
+    table: str,
+    format: str = "ndjson",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    gzip: bool = False,
+):
+    """Exporta `analysis_sessions`, `alert_history` o `posture_events` en streaming (NDJSON/CSV)."""
+    if table not in EXPORT_TABLES:
+        return JSONResponse({"ok": False, "reason": "unknown_table"}, status_code=404)
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"ok": False, "reason": "unknown_format"}, status_code=400)
+    filename = export_filename(table, format, gzip)
+    return StreamingResponse(
+        stream_export(table, format, start, end, compress=gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/fleet/ingest/{table}")
+async def fleet_ingest(table: str, client_id: str, request: Request):
+    """Recibe un lote NDJSON (gzip opcional) de otra estación y lo agrega en `fleet_*`.
+
+    Acepta la salida de `/api/export/{table}?format=ndjson&gzip=true` tal cual. El cuerpo (en
+    claro o comprimido) se limita a `MAX_BATCH_BYTES` antes de leerlo entero en memoria.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None and (not declared.isdigit() or int(declared) > MAX_BATCH_BYTES):
+        return JSONResponse({"ok": False, "reason": "batch_too_large"}, status_code=413)
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BATCH_BYTES:
+            return JSONResponse({"ok": False, "reason": "batch_too_large"}, status_code=413)
+        chunks.append(chunk)
+    body = b"".join(chunks)
+    try:
+        # SQLite es bloqueante: fuera del event loop
+        report = await run_in_threadpool(ingest_batch, table, client_id, body)
+    except ValueError as exc:
+        return JSONResponse({"ok": False, "reason": str(exc)}, status_code=400)
+    return {"ok": True, **report}
 
 
 @app.get("/api/privacy-policy")
 def privacy_policy():
     return {
         "dataRetention": {
-            "maxHistoryDays": 30,
+            "maxHistoryDays": MAX_HISTORY_DAYS,
             "aggregatedDataOnly": True,
             "localStorageOnly": True,
         },
@@ -115,6 +348,36 @@ async def ws_stream(ws: WebSocket):
         return
 
 
+@app.websocket("/api/cv/events")
+async def ws_events(ws: WebSocket):
+    """Canal de eventos de alerta: solo transiciones `enter` / `escalate` / `clear`.
+
+    Al conectar se envía un `snapshot` con las alertas activas para que un renderer recargado
+    no tenga que re-evaluar nada. Acepta `?since=<seq>` para reanudar tras una reconexión.
+    """
+    await ws.accept()
+    try:
+        seq = int(ws.query_params.get("since", cv_session.events.last_seq))
+    except ValueError:
+        seq = cv_session.events.last_seq
+    # Un `since` mayor que la secuencia actual indica que el backend se reinició
+    seq = min(seq, cv_session.events.last_seq)
+    try:
+        await ws.send_json({
+            "type": "snapshot",
+            "seq": cv_session.events.last_seq,
+            "active_alerts": cv_session.alerts.active_alerts(),
+        })
+        while True:
+            events = cv_session.events.since(seq)
+            for ev in events:
+                await ws.send_json(ev)
+                seq = ev["seq"]
+            await asyncio_sleep(0.1)
+    except WebSocketDisconnect:
+        return
+
+
 # FastAPI no expone asyncio.sleep directamente
 async def asyncio_sleep(seconds: float) -> None:
     import asyncio
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import copy
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .db import get_settings as db_get_settings, settings_kv_get_all, settings_kv_set_many
+from ..cv_engine.ergonomic_analyzer import ERGONOMIC_STANDARDS
+from ..cv_engine.landmark_recording import resolve_recordings_dir
+from ..cv_engine.metric_registry import DEFAULT_REGISTRY
+
+
+# Claves configurables en caliente y sus valores por defecto (el tipo del default valida la entrada)
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "autostart": False,
+    "notifications": True,
+    "cv.target_fps": 30.0,
+    "cv.target_width": 640,
+    "cv.target_height": 360,
+    "cv.model_complexity": 1,
+    "cv.min_detection_confidence": 0.5,
+    "cv.min_tracking_confidence": 0.5,
+    "ergonomic.standards": ERGONOMIC_STANDARDS,
+    # Métricas opcionales además de CORE_METRICS (p. ej. "wrist_deviation", "head_tilt")
+    "ergonomic.extra_metrics": [],
+    "alerts.debounce_s": 5.0,
+    "alerts.escalate_s": 10.0,
+    "alerts.clear_s": 3.0,
+    "alerts.cooldown_s": 30.0,
+    "session.checkpoint_interval_s": 15.0,
+    "session.break_min_s": 60.0,
+    "preview.enabled": False,
+    "preview.width": 320,
+    "preview.fps": 5.0,
+    "preview.jpeg_quality": 70,
+    "recording.enabled": False,
+    # Relativo a la raíz de grabaciones (`ERGONOMIC_RECORDINGS`); no se admiten rutas fuera de ella
+    "recording.dir": "",
+}
+
+# Rango válido (inclusive) de las claves numéricas; los valores se aplican en el hilo de CV,
+# así que se rechazan en `update()` antes de que puedan romper la cámara o el modelo
+CONFIG_BOUNDS: Dict[str, Tuple[float, float]] = {
+    "cv.target_fps": (1.0, 60.0),
+    "cv.target_width": (160, 1920),
+    "cv.target_height": (120, 1080),
+    "cv.model_complexity": (0, 2),
+    "cv.min_detection_confidence": (0.0, 1.0),
+    "cv.min_tracking_confidence": (0.0, 1.0),
+    "alerts.debounce_s": (0.0, 3600.0),
+    "alerts.escalate_s": (0.0, 3600.0),
+    "alerts.clear_s": (0.0, 3600.0),
+    "alerts.cooldown_s": (0.0, 3600.0),
+    "session.checkpoint_interval_s": (1.0, 3600.0),
+    "session.break_min_s": (1.0, 86400.0),
+    "preview.width": (80, 1280),
+    "preview.fps": (0.5, 30.0),
+    "preview.jpeg_quality": (10, 95),
+}
+
+# Umbrales admitidos por métrica en `ergonomic.standards`
+STANDARD_THRESHOLDS = frozenset({"optimal", "acceptable", "warning", "critical"})
+
+# Claves que solo puede cambiar el proceso local (Electron/CLI con el token de arranque), nunca
+# una página web cualquiera vía `POST /api/config`
+LOCAL_ONLY_KEYS = frozenset({"preview.enabled"})
+
+ConfigListener = Callable[[Dict[str, Any], int], None]
+
+
+class ConfigStore:
+    """Configuración en memoria, versionada, con persistencia write-through en `user_settings_kv`.
+
+    - Las lecturas (`get` / `snapshot`) no tocan SQLite.
+    - `update()` valida, persiste en una transacción, incrementa `version` y notifica a los
+      suscriptores solo con las claves que realmente cambiaron.
+
+    Ejemplo
+    -------
+    >>> store = ConfigStore()
+    >>> store.get("cv.target_fps")
+    30.0
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Any]] = None) -> None:
+        self._defaults = copy.deepcopy(defaults if defaults is not None else DEFAULT_CONFIG)
+        self._values: Dict[str, Any] = copy.deepcopy(self._defaults)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._listeners: List[ConfigListener] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def load(self) -> None:
+        """Carga los valores persistidos (una sola lectura de SQLite al arrancar)."""
+        stored = settings_kv_get_all()
+        legacy = db_get_settings()
+        with self._lock:
+            for key in ("autostart", "notifications"):
+                if key not in stored:
+                    self._values[key] = legacy[key]
+            for key, raw in stored.items():
+                if key not in self._defaults:
+                    continue
+                try:
+                    self._values[key] = self._coerce(key, json.loads(raw))
+                except (ValueError, TypeError):
+                    continue  # valor corrupto: conservar default
+            self._version += 1
+
+    def get(self, key: str) -> Any:
+        return self._values[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": self._version, "values": copy.deepcopy(self._values)}
+
+    def update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Aplica cambios. Lanza `ValueError` si alguna clave o valor no es válido.
+
+        Devuelve el subconjunto de claves cuyo valor cambió.
+        """
+        coerced = {key: self._coerce(key, value) for key, value in changes.items()}
+        with self._lock:
+            changed = {k: v for k, v in coerced.items() if self._values.get(k) != v}
+            if not changed:
+                return {}
+            settings_kv_set_many({k: json.dumps(v) for k, v in changed.items()})
+            self._values.update(changed)
+            self._version += 1
+            version = self._version
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(copy.deepcopy(changed), version)
+        return changed
+
+    def subscribe(self, listener: ConfigListener) -> None:
+        """Registra un callback `(changed, version)` invocado tras cada cambio."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    # ------------------------ utilidades internas ------------------------
+    def _coerce(self, key: str, value: Any) -> Any:
+        if key not in self._defaults:
+            raise ValueError(f"unknown_key: {key}")
+        default = self._defaults[key]
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"invalid_value: {key}")
+            return value
+        if isinstance(default, (int, float)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"invalid_value: {key}")
+            if isinstance(default, int) and value != int(value):
+                raise ValueError(f"invalid_value: {key}")
+            bounds = CONFIG_BOUNDS.get(key)
+            if bounds is not None and not bounds[0] <= value <= bounds[1]:
+                raise ValueError(f"out_of_range: {key} ({bounds[0]}..{bounds[1]})")
+            return type(default)(value)
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"invalid_value: {key}")
+            # Fusión por métrica para permitir cambios parciales de umbrales
+            merged = copy.deepcopy(self._values.get(key, default))
+            for metric, thresholds in value.items():
+                if metric not in DEFAULT_REGISTRY.metric_names:
+                    raise ValueError(f"unknown_metric: {key}.{metric}")
+                if not isinstance(thresholds, dict):
+                    raise ValueError(f"invalid_value: {key}.{metric}")
+                unknown = sorted(set(thresholds) - STANDARD_THRESHOLDS)
+                if unknown:
+                    raise ValueError(f"unknown_threshold: {key}.{metric}: {unknown}")
+                if any(
+                    isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v)
+                    for v in thresholds.values()
+                ):
+                    raise ValueError(f"invalid_value: {key}.{metric}")
+                merged.setdefault(metric, {}).update({k: float(v) for k, v in thresholds.items()})
+            return merged
+        if isinstance(default, list):
+            if not isinstance(value, list) or any(m not in DEFAULT_REGISTRY.metric_names for m in value):
+                raise ValueError(f"invalid_value: {key}")
+            return list(dict.fromkeys(value))
+        if key == "recording.dir":
+            if not isinstance(value, str):
+                raise ValueError(f"invalid_value: {key}")
+            resolve_recordings_dir(value)
+        return value
+
+
+# Instancia global única para el backend
+runtime_config = ConfigStore()
@@ -1,14 +1,31 @@
 import os
 import sqlite3
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 DB_PATH = Path(os.environ.get("ERGONOMIC_DB", Path(__file__).resolve().parent.parent / "ergonomic.db"))
+# Política de retención (días) del historial y de las grabaciones de landmarks
+MAX_HISTORY_DAYS = 30
 
 
-def get_conn() -> sqlite3.Connection:
-    return sqlite3.connect(DB_PATH)
+def get_conn(timeout: float = 5.0) -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH, timeout=timeout)
+
+
+def to_db_timestamp(epoch_s: float) -> str:
+    """Convierte epoch (s) al formato UTC de SQLite (`datetime('now')`)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch_s))
+
+
+def _ensure_column(cur: sqlite3.Cursor, table: str, column: str, decl: str) -> bool:
+    """Añade una columna a una tabla creada por una versión anterior. True si la añadió."""
+    existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    if column in existing:
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
 
 
 def init_db() -> None:
@@ -55,10 +72,14 @@ def init_db() -> None:
                 end_time TIMESTAMP,
                 average_posture_score REAL,
                 alerts_triggered INTEGER,
-                breaks_taken INTEGER
+                breaks_taken INTEGER,
+                finalized INTEGER NOT NULL DEFAULT 0
             );
             """
         )
+        if _ensure_column(cur, "analysis_sessions", "finalized", "INTEGER NOT NULL DEFAULT 0"):
+            # Filas de versiones anteriores: solo se escribían al cerrar la sesión
+            cur.execute("UPDATE analysis_sessions SET finalized = 1 WHERE end_time IS NOT NULL")
 
         # Historial de alertas para aprendizaje de patrones
         cur.execute(
@@ -69,10 +90,47 @@ def init_db() -> None:
                 triggered_at TIMESTAMP,
                 dismissed_at TIMESTAMP,
                 user_action TEXT,
-                effectiveness_score INTEGER
+                effectiveness_score INTEGER,
+                severity TEXT
             );
             """
         )
+        _ensure_column(cur, "alert_history", "severity", "TEXT")
+        # Agregación de flota: filas recibidas de otras estaciones, únicas por (cliente, id local)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fleet_sessions (
+                client_id TEXT NOT NULL,
+                source_id INTEGER NOT NULL,
+                start_time TIMESTAMP,
+                end_time TIMESTAMP,
+                average_posture_score REAL,
+                alerts_triggered INTEGER,
+                breaks_taken INTEGER,
+                finalized INTEGER,
+                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (client_id, source_id)
+            );
+            """
+        )
+        _ensure_column(cur, "fleet_sessions", "finalized", "INTEGER")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fleet_alert_history (
+                client_id TEXT NOT NULL,
+                source_id INTEGER NOT NULL,
+                alert_type TEXT NOT NULL,
+                triggered_at TIMESTAMP,
+                dismissed_at TIMESTAMP,
+                user_action TEXT,
+                effectiveness_score INTEGER,
+                severity TEXT,
+                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (client_id, source_id)
+            );
+            """
+        )
+        _ensure_column(cur, "fleet_alert_history", "severity", "TEXT")
         # Asegurar fila única de settings
         cur.execute("INSERT OR IGNORE INTO user_settings (id) VALUES (1);")
         conn.commit()
@@ -109,6 +167,25 @@ def settings_kv_set(key: str, value: str) -> None:
         conn.commit()
 
 
+def settings_kv_set_many(items: Dict[str, str]) -> None:
+    """Escribe varias claves en `user_settings_kv` en una sola transacción."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.executemany(
+            "INSERT INTO user_settings_kv(key, value) VALUES(?, ?)\n"
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=CURRENT_TIMESTAMP",
+            list(items.items()),
+        )
+        conn.commit()
+
+
+def settings_kv_get_all() -> Dict[str, str]:
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT key, value FROM user_settings_kv")
+        return {key: value for key, value in cur.fetchall()}
+
+
 def insert_session_summary(
     start_time: str,
     end_time: str,
@@ -120,8 +197,8 @@ def insert_session_summary(
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO analysis_sessions(start_time, end_time, average_posture_score, alerts_triggered, breaks_taken)
-            VALUES(?, ?, ?, ?, ?)
+            INSERT INTO analysis_sessions(start_time, end_time, average_posture_score, alerts_triggered, breaks_taken, finalized)
+            VALUES(?, ?, ?, ?, ?, 1)
             """,
             (start_time, end_time, average_posture_score, alerts_triggered, breaks_taken),
         )
@@ -129,6 +206,42 @@ def insert_session_summary(
         return int(cur.lastrowid)
 
 
+def upsert_session_summary(
+    session_id: Optional[int],
+    start_time: str,
+    end_time: str,
+    average_posture_score: Optional[float],
+    alerts_triggered: int,
+    breaks_taken: int,
+    finalized: bool = False,
+) -> int:
+    """Inserta o actualiza (por `id`) el resumen de una sesión.
+
+    Con `session_id=None` crea la fila; los checkpoints siguientes la actualizan en sitio.
+    `finalized=True` marca el cierre limpio (`stop()`): una fila que queda con `finalized = 0`
+    corresponde a una sesión interrumpida (cierre abrupto del backend). Devuelve el `id` de la fila.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO analysis_sessions(
+                id, start_time, end_time, average_posture_score, alerts_triggered, breaks_taken, finalized
+            )
+            VALUES(?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                end_time=excluded.end_time,
+                average_posture_score=excluded.average_posture_score,
+                alerts_triggered=excluded.alerts_triggered,
+                breaks_taken=excluded.breaks_taken,
+                finalized=excluded.finalized
+            """,
+            (session_id, start_time, end_time, average_posture_score, alerts_triggered, breaks_taken, 1 if finalized else 0),
+        )
+        conn.commit()
+        return int(session_id if session_id is not None else cur.lastrowid)
+
+
 def insert_alert_history(
     alert_type: str,
     triggered_at: str,
@@ -149,7 +262,149 @@ def insert_alert_history(
         return int(cur.lastrowid)
 
 
-def purge_old_data(max_history_days: int = 30) -> None:
+def record_alert_events(events: Iterable[Dict[str, Any]]) -> int:
+    """Persiste un lote de eventos de alerta en `alert_history` en una sola transacción.
+
+    Cada episodio de alerta es una fila: `enter` la inserta con su severidad, `escalate`
+    actualiza la severidad de la fila abierta más reciente de ese tipo y `clear` marca su
+    `dismissed_at` (filas abiertas más antiguas las cierra `close_open_alerts`). `user_action`
+    queda libre para la respuesta del usuario. Se respeta el orden del lote agrupando tramos
+    consecutivos del mismo tipo en un único `executemany`. Devuelve el número de eventos persistidos.
+    """
+    insert_sql = (
+        "INSERT INTO alert_history(alert_type, triggered_at, dismissed_at, user_action, effectiveness_score, severity) "
+        "VALUES(?, ?, NULL, NULL, NULL, ?)"
+    )
+    newest_open = "id = (SELECT MAX(id) FROM alert_history WHERE alert_type = ? AND dismissed_at IS NULL)"
+    escalate_sql = f"UPDATE alert_history SET severity = ? WHERE {newest_open}"
+    clear_sql = f"UPDATE alert_history SET dismissed_at = ? WHERE {newest_open}"
+    runs: list = []  # [(sql, [params...]), ...]
+    for ev in events:
+        ts = to_db_timestamp(float(ev["ts"]))
+        if ev["type"] == "enter":
+            sql, params = insert_sql, (ev["alert_type"], ts, ev.get("severity"))
+        elif ev["type"] == "escalate":
+            sql, params = escalate_sql, (ev.get("severity"), ev["alert_type"])
+        elif ev["type"] == "clear":
+            sql, params = clear_sql, (ts, ev["alert_type"])
+        else:
+            continue
+        if runs and runs[-1][0] is sql:
+            runs[-1][1].append(params)
+        else:
+            runs.append((sql, [params]))
+    if not runs:
+        return 0
+    with get_conn() as conn:
+        cur = conn.cursor()
+        for sql, rows in runs:
+            cur.executemany(sql, rows)
+        conn.commit()
+    return sum(len(rows) for _, rows in runs)
+
+
+def close_open_alerts() -> int:
+    """Cierra las filas de `alert_history` que quedaron abiertas (p. ej. tras un cierre abrupto).
+
+    Se llama al arrancar y antes de cada sesión, cuando no puede haber episodios en curso. El
+    `dismissed_at` es el último checkpoint de la sesión en la que se disparó la alerta (o el
+    propio `triggered_at` si no hay sesión): el episodio no pudo durar más que esa sesión.
+    Devuelve el número de filas cerradas.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            UPDATE alert_history SET dismissed_at = MAX(triggered_at, COALESCE((
+                SELECT s.end_time FROM analysis_sessions s
+                WHERE s.start_time <= alert_history.triggered_at
+                ORDER BY s.start_time DESC LIMIT 1
+            ), triggered_at))
+            WHERE dismissed_at IS NULL
+            """
+        )
+        conn.commit()
+        return cur.rowcount
+
+
+# Tablas exportables: columna temporal para filtrar por rango y columnas en orden
+EXPORT_TABLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "analysis_sessions": (
+        "start_time",
+        ("id", "start_time", "end_time", "average_posture_score", "alerts_triggered", "breaks_taken", "finalized"),
+    ),
+    "alert_history": (
+        "triggered_at",
+        ("id", "alert_type", "triggered_at", "dismissed_at", "user_action", "effectiveness_score", "severity"),
+    ),
+    "posture_events": ("ts", ("id", "ts", "severity", "message")),
+}
+
+
+def iter_table_chunks(
+    table: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    chunk_size: int = 500,
+) -> Iterator[List[tuple]]:
+    """Recorre una tabla exportable en bloques de `chunk_size` filas ordenadas por `id`.
+
+    Paginación por clave (`id > último`): cada bloque es una consulta corta, así que no se
+    mantiene un bloqueo de lectura durante toda la exportación ni se carga la tabla en memoria.
+    `start` incluido, `end` excluido, en formato de SQLite (`YYYY-MM-DD[ HH:MM:SS]`).
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"unknown_table: {table}")
+    ts_col, columns = EXPORT_TABLES[table]
+    where = ["id > ?"]
+    params: List[Any] = []
+    if start:
+        where.append(f"{ts_col} >= ?")
+        params.append(start)
+    if end:
+        where.append(f"{ts_col} < ?")
+        params.append(end)
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+    # El generador puede reanudarse desde otro hilo (StreamingResponse usa un threadpool)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    try:
+        last_id = 0
+        while True:
+            rows = conn.execute(sql, (last_id, *params, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    finally:
+        conn.close()
+
+
+def upsert_fleet_rows(target: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+    """Inserta filas de flota con un único `executemany` en una transacción.
+
+    `rows` empiezan por `(client_id, source_id)` seguidos de `columns`. Un duplicado solo
+    actualiza la fila si algún valor cambió (p. ej. una sesión con checkpoint más reciente).
+    Devuelve el número de filas escritas (nuevas o modificadas).
+    """
+    all_cols = ("client_id", "source_id", *columns)
+    updates = ", ".join(f"{c}=excluded.{c}" for c in columns)
+    changed = " OR ".join(f"{c} IS NOT excluded.{c}" for c in columns)
+    sql = (
+        f"INSERT INTO {target}({', '.join(all_cols)}) VALUES({', '.join('?' for _ in all_cols)}) "
+        f"ON CONFLICT(client_id, source_id) DO UPDATE SET {updates}, received_at=CURRENT_TIMESTAMP "
+        f"WHERE {changed}"
+    )
+    # Espera más larga: varios clientes pueden estar empujando lotes a la vez
+    with get_conn(timeout=30.0) as conn:
+        cur = conn.cursor()
+        cur.executemany(sql, rows)
+        conn.commit()
+        return int(cur.rowcount)
+
+
+def purge_old_data(max_history_days: int = MAX_HISTORY_DAYS) -> None:
     """Elimina datos antiguos respetando políticas de retención."""
     with get_conn() as conn:
         cur = conn.cursor()
@@ -161,6 +416,14 @@ def purge_old_data(max_history_days: int = 30) -> None:
             "DELETE FROM alert_history WHERE triggered_at < datetime('now', ?)",
             (f'-{max_history_days} days',),
         )
+        cur.execute(
+            "DELETE FROM fleet_sessions WHERE end_time IS NOT NULL AND end_time < datetime('now', ?)",
+            (f'-{max_history_days} days',),
+        )
+        cur.execute(
+            "DELETE FROM fleet_alert_history WHERE triggered_at < datetime('now', ?)",
+            (f'-{max_history_days} days',),
+        )
         conn.commit()
 
 
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterator, Optional
+
+from .db import EXPORT_TABLES, iter_table_chunks
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def stream_export(
+    table: str,
+    fmt: str = "ndjson",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    compress: bool = False,
+    chunk_size: int = 500,
+) -> Iterator[bytes]:
+    """Genera la exportación de una tabla de historial como bloques de bytes.
+
+    Cada bloque de `chunk_size` filas se serializa y (opcionalmente) se comprime con gzip al vuelo,
+    de modo que la memoria se mantiene constante independientemente del número de filas.
+
+    Ejemplo
+    -------
+    >>> body = b"".join(stream_export("alert_history", "csv"))  # doctest: +SKIP
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown_format: {fmt}")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"unknown_table: {table}")
+    columns = EXPORT_TABLES[table][1]
+    # wbits=31 -> contenedor gzip
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(data: bytes) -> bytes:
+        return gz.compress(data) if gz is not None else data
+
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columns)
+        header = emit(buf.getvalue().encode("utf-8"))
+        if header:
+            yield header
+        for rows in iter_table_chunks(table, start, end, chunk_size):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(rows)
+            out = emit(buf.getvalue().encode("utf-8"))
+            if out:
+                yield out
+    else:
+        for rows in iter_table_chunks(table, start, end, chunk_size):
+            lines = "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+            out = emit(lines.encode("utf-8"))
+            if out:
+                yield out
+
+    if gz is not None:
+        yield gz.flush()
+
+
+def export_filename(table: str, fmt: str, compress: bool) -> str:
+    return f"{table}.{fmt}{'.gz' if compress else ''}"
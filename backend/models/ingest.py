@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Tuple
+
+from .db import upsert_fleet_rows
+
+
+# Tabla de origen (formato de `/api/export`) -> (tabla de flota, columnas copiadas)
+INGEST_TABLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "analysis_sessions": (
+        "fleet_sessions",
+        ("start_time", "end_time", "average_posture_score", "alerts_triggered", "breaks_taken", "finalized"),
+    ),
+    "alert_history": (
+        "fleet_alert_history",
+        ("alert_type", "triggered_at", "dismissed_at", "user_action", "effectiveness_score", "severity"),
+    ),
+}
+# Límite del cuerpo recibido y del lote descomprimido (protege frente a "gzip bombs")
+MAX_BATCH_BYTES = 32 * 1024 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+# Rango de INTEGER en SQLite (64 bits con signo)
+_SQLITE_INT_MIN, _SQLITE_INT_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def decode_batch(body: bytes) -> bytes:
+    """Devuelve el NDJSON en claro; descomprime si el cuerpo es gzip."""
+    if len(body) > MAX_BATCH_BYTES:
+        raise ValueError("batch_too_large")
+    if not body.startswith(_GZIP_MAGIC):
+        return body
+    d = zlib.decompressobj(31)
+    try:
+        out = d.decompress(body, MAX_BATCH_BYTES + 1)
+    except zlib.error:
+        raise ValueError("invalid_gzip") from None
+    if len(out) > MAX_BATCH_BYTES or d.unconsumed_tail:
+        raise ValueError("batch_too_large")
+    # Flujo truncado: no se alcanzó el final del miembro gzip
+    if not d.eof:
+        raise ValueError("invalid_gzip")
+    return out
+
+
+def _storable(value: Any) -> bool:
+    """True si SQLite puede guardar el valor tal cual (escalar JSON; enteros de 64 bits)."""
+    if value is None or isinstance(value, (str, float)):
+        return True
+    if isinstance(value, int):
+        return _SQLITE_INT_MIN <= value <= _SQLITE_INT_MAX
+    return False
+
+
+def ingest_batch(table: str, client_id: str, body: bytes) -> Dict[str, Any]:
+    """Ingiere un lote NDJSON (opcionalmente comprimido) de otra estación.
+
+    Cada línea es un objeto con `id` (id de fila local del cliente) y las columnas de la tabla,
+    tal como las produce `/api/export/{table}?format=ndjson`. Se deduplica por
+    `(client_id, id)` dentro del lote y contra lo ya almacenado; se inserta con un único
+    `executemany` en una transacción.
+
+    Ejemplo
+    -------
+    >>> ingest_batch("alert_history", "ws-01", b'{"id": 1, "alert_type": "neck_forward"}\\n')  # doctest: +SKIP
+    {'table': 'alert_history', 'client_id': 'ws-01', 'received': 1, 'written': 1, ...}
+    """
+    if table not in INGEST_TABLES:
+        raise ValueError(f"unknown_table: {table}")
+    if not client_id:
+        raise ValueError("missing_client_id")
+    target, columns = INGEST_TABLES[table]
+    t0 = time.perf_counter()
+
+    raw = decode_batch(body)
+    by_key: Dict[int, tuple] = {}
+    received = 0
+    rejected = 0
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        received += 1
+        try:
+            obj = json.loads(line)
+            source_id = int(obj["id"])
+        except (ValueError, KeyError, TypeError, OverflowError):
+            rejected += 1
+            continue
+        if table == "alert_history" and not obj.get("alert_type"):
+            rejected += 1
+            continue
+        values = tuple(obj.get(c) for c in columns)
+        # Objetos, listas o enteros fuera de rango harían fallar el `executemany` del lote entero
+        if not _storable(source_id) or not all(_storable(v) for v in values):
+            rejected += 1
+            continue
+        # Última aparición gana si el cliente reenvía la misma fila en el lote
+        by_key[source_id] = (client_id, source_id, *values)
+
+    rows: List[tuple] = list(by_key.values())
+    written = upsert_fleet_rows(target, columns, rows) if rows else 0
+    elapsed = time.perf_counter() - t0
+    return {
+        "table": table,
+        "client_id": client_id,
+        "received": received,
+        "written": written,
+        "duplicates": len(rows) - written + (received - rejected - len(rows)),
+        "rejected": rejected,
+        "bytes": len(body),
+        "elapsed_ms": round(elapsed * 1000.0, 2),
+        "rows_per_s": round(received / elapsed, 1) if elapsed > 0 else None,
+    }
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from backend.models import db
+
+
+@pytest.fixture()
+def tmp_db(tmp_path, monkeypatch) -> Path:
+    """Base de datos SQLite temporal e inicializada; devuelve su ruta."""
+    path = tmp_path / "test.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+    return path
+
+
+@pytest.fixture()
+def dummy_landmarks() -> List[Dict[str, float]]:
+    # Pose sentada estable: 33 landmarks al centro salvo cabeza, hombros, brazos y caderas
+    lms = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    lms[7], lms[8] = {"x": 0.48, "y": 0.45, "z": 0.0, "visibility": 1.0}, {"x": 0.52, "y": 0.45, "z": 0.0, "visibility": 1.0}
+    lms[11], lms[12] = {"x": 0.45, "y": 0.55, "z": 0.0, "visibility": 1.0}, {"x": 0.55, "y": 0.55, "z": 0.0, "visibility": 1.0}
+    lms[13], lms[14] = {"x": 0.42, "y": 0.60, "z": 0.0, "visibility": 1.0}, {"x": 0.58, "y": 0.60, "z": 0.0, "visibility": 1.0}
+    lms[15], lms[16] = {"x": 0.42, "y": 0.65, "z": 0.0, "visibility": 1.0}, {"x": 0.58, "y": 0.65, "z": 0.0, "visibility": 1.0}
+    lms[23], lms[24] = {"x": 0.47, "y": 0.70, "z": 0.0, "visibility": 1.0}, {"x": 0.53, "y": 0.70, "z": 0.0, "visibility": 1.0}
+    return lms
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import sqlite3
+
+from backend.cv_engine.alert_engine import AlertEngine, AlertRules
+from backend.models import db
+
+
+def _rules() -> AlertRules:
+    return AlertRules(debounce_s=2.0, escalate_s=3.0, clear_s=1.0, cooldown_s=10.0)
+
+
+def test_alert_engine_emits_only_transitions():
+    engine = AlertEngine(_rules(), metrics=["neck_angle"])
+    types = []
+    for t in range(0, 20):
+        sev = "warning" if t < 5 else ("critical" if t < 10 else "optimal")
+        types += [e["type"] for e in engine.update({"neck_angle": sev}, now=float(t))]
+    # enter tras el debounce, escalate tras 3s en critical, clear tras 1s saludable
+    assert types == ["enter", "escalate", "clear"]
+    assert engine.active_alerts() == {}
+
+
+def test_alert_engine_cooldown_blocks_reentry():
+    engine = AlertEngine(_rules(), metrics=["back_angle"])
+    assert [e["type"] for e in engine.update({"back_angle": "critical"}, now=0.0)] == []
+    assert [e["type"] for e in engine.update({"back_angle": "critical"}, now=2.0)] == ["enter"]
+    engine.update({"back_angle": "optimal"}, now=3.0)
+    assert [e["type"] for e in engine.update({}, now=4.0)] == ["clear"]
+    # Dentro del cooldown no se re-emite aunque persista la mala postura
+    for t in range(5, 14):
+        assert engine.update({"back_angle": "warning"}, now=float(t)) == []
+    assert [e["type"] for e in engine.update({"back_angle": "warning"}, now=14.0)] == ["enter"]
+
+
+def test_alert_engine_debounces_across_warning_critical_flicker():
+    engine = AlertEngine(_rules(), metrics=["neck_angle"])
+    events = []
+    # Landmarks ruidosos cerca del límite: warning/critical alternando a 30 fps
+    for i in range(20 * 30):
+        sev = "warning" if i % 2 else "critical"
+        events += engine.update({"neck_angle": sev}, now=i / 30.0)
+    assert [e["type"] for e in events] == ["enter"]
+    assert list(engine.active_alerts()) == ["neck_angle"]
+
+
+def test_record_alert_events_one_row_per_episode(tmp_db):
+    engine = AlertEngine(AlertRules(debounce_s=0.0, escalate_s=1.0, clear_s=0.0), metrics=["neck_angle"])
+    events = engine.update({"neck_angle": "warning"}, now=1_700_000_000.0)
+    events += engine.update({"neck_angle": "critical"}, now=1_700_000_001.0)
+    events += engine.update({"neck_angle": "critical"}, now=1_700_000_002.0)
+    assert [e["type"] for e in events] == ["enter", "escalate"]
+    db.record_alert_events(events)
+    db.record_alert_events(engine.update({}, now=1_700_000_003.0))
+    with sqlite3.connect(db.DB_PATH) as conn:
+        rows = conn.execute("SELECT alert_type, severity, user_action, dismissed_at FROM alert_history").fetchall()
+    assert rows == [("neck_forward", "critical", None, "2023-11-14 22:13:23")]
+
+
+def test_record_alert_events_batches_into_history(tmp_db):
+    engine = AlertEngine(AlertRules(debounce_s=0.0, clear_s=0.0), metrics=["neck_angle"])
+    events = engine.update({"neck_angle": "warning"}, now=1_700_000_000.0)
+    events += engine.update({"neck_angle": "optimal"}, now=1_700_000_030.0)
+    assert db.record_alert_events(events) == 2
+    with sqlite3.connect(db.DB_PATH) as conn:
+        rows = conn.execute("SELECT alert_type, triggered_at, dismissed_at FROM alert_history").fetchall()
+    assert rows == [("neck_forward", "2023-11-14 22:13:20", "2023-11-14 22:13:50")]
+
+
+def test_stale_open_row_not_touched_by_later_episode(tmp_db):
+    day1, day2 = 1_700_000_000.0, 1_700_090_000.0
+    sid = db.upsert_session_summary(None, db.to_db_timestamp(day1 - 60), db.to_db_timestamp(day1 + 600), 7.0, 1, 0)
+    assert sid
+    # Día 1: `enter` sin `clear` (cierre abrupto)
+    db.record_alert_events([{"type": "enter", "alert_type": "neck_forward", "ts": day1, "severity": "warning"}])
+    db.record_alert_events([
+        {"type": "enter", "alert_type": "neck_forward", "ts": day2, "severity": "warning"},
+        {"type": "escalate", "alert_type": "neck_forward", "ts": day2 + 10, "severity": "critical"},
+        {"type": "clear", "alert_type": "neck_forward", "ts": day2 + 20},
+    ])
+    query = "SELECT triggered_at, severity, dismissed_at FROM alert_history ORDER BY id"
+    with sqlite3.connect(db.DB_PATH) as conn:
+        rows = conn.execute(query).fetchall()
+    assert rows == [
+        (db.to_db_timestamp(day1), "warning", None),
+        (db.to_db_timestamp(day2), "critical", db.to_db_timestamp(day2 + 20)),
+    ]
+    # Al arrancar/iniciar sesión: cerrada en el último checkpoint de su sesión
+    assert db.close_open_alerts() == 1
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute(query).fetchall()[0] == (db.to_db_timestamp(day1), "warning", db.to_db_timestamp(day1 + 600))
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+from starlette.requests import Request
+
+from backend import main
+from backend.cv_engine.session_manager import CVSessionManager
+
+
+def test_payload_cached_per_version_and_projected():
+    session = CVSessionManager()
+    etag, body = session.get_current_analysis_payload()
+    # Sin análisis nuevo: mismos bytes (no se re-serializa) y mismo ETag
+    assert session.get_current_analysis_payload() == (etag, body)
+    assert session.get_current_analysis_payload()[1] is body
+
+    with session._lock:
+        session._last_detection = {"landmarks": [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0}] * 33}
+        session._last_analysis = {"overall_severity": "optimal", "angles": {"neck_angle": 1.0}, "seq": 1, "ts": 1.0}
+        session._analysis_seq = 1
+    new_etag, new_body = session.get_current_analysis_payload()
+    assert new_etag != etag
+    assert "landmarks" in json.loads(new_body)
+
+    light_etag, light_body = session.get_current_analysis_payload(frozenset({"angles"}))
+    assert light_etag != new_etag
+    assert json.loads(light_body) == {"angles": {"neck_angle": 1.0}, "seq": 1, "ts": 1.0, "session_state": "idle"}
+
+
+def test_status_etag_ignores_fps_and_tracks_state():
+    session = CVSessionManager()
+    etag, body = session.get_status_payload()
+    assert etag.startswith('W/"')
+    assert json.loads(body)["state"] == "idle"
+    # ETag vigente: 304 sin serializar
+    assert session.get_status_payload(etag) == (etag, None)
+
+    # Un análisis nuevo (fps, contadores) no invalida el estado
+    with session._lock:
+        session._analysis_seq += 1
+    assert session.get_status_payload(etag) == (etag, None)
+
+    session._set_state("opening")
+    new_etag, new_body = session.get_status_payload(etag)
+    assert new_etag != etag
+    assert json.loads(new_body)["state"] == "opening"
+
+    with session._lock:
+        session._last_error = "camera_open_failed"
+    assert session.get_status_payload(new_etag)[0] != new_etag
+
+
+def _poll_request(etag: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/cv/current-analysis",
+        "headers": [(b"if-none-match", etag.encode())],
+        "query_string": b"",
+    })
+
+
+def test_long_poll_wakes_on_new_analysis(monkeypatch):
+    session = CVSessionManager()
+    signal = main._AnalysisSignal()
+    session.subscribe_analysis(signal.notify_threadsafe)
+    monkeypatch.setattr(main, "cv_session", session)
+    monkeypatch.setattr(main, "analysis_signal", signal)
+
+    def publish():
+        time.sleep(0.2)
+        with session._lock:
+            session._last_analysis = {"overall_severity": "optimal", "seq": 1, "ts": 1.0}
+            session._analysis_seq = 1
+        session._notify_analysis()
+
+    async def poll():
+        signal.bind(asyncio.get_running_loop())
+        etag, _ = session.get_current_analysis_payload()
+        # Sin análisis nuevo: 304 al agotar la espera
+        assert (await main.current_analysis(_poll_request(etag), wait=0.1)).status_code == 304
+        threading.Thread(target=publish).start()
+        start = time.monotonic()
+        response = await main.current_analysis(_poll_request(etag), wait=10.0)
+        return response, time.monotonic() - start
+
+    response, elapsed = asyncio.run(poll())
+    assert response.status_code == 200
+    assert json.loads(response.body)["seq"] == 1
+    assert elapsed < 2.0
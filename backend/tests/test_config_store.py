@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.cv_engine.pose_detector import PoseDetector
+from backend.models.config_store import ConfigStore
+
+
+@pytest.fixture()
+def store(tmp_db) -> ConfigStore:
+    s = ConfigStore()
+    s.load()
+    return s
+
+
+def test_config_store_write_through_and_notify(store):
+    seen = []
+    store.subscribe(lambda changed, version: seen.append((changed, version)))
+    version = store.version
+    assert store.update({"cv.target_fps": 15, "autostart": False}) == {"cv.target_fps": 15.0}
+    assert store.version == version + 1
+    assert seen == [({"cv.target_fps": 15.0}, version + 1)]
+    # Sin cambios efectivos: ni versión nueva ni notificación
+    assert store.update({"cv.target_fps": 15.0}) == {}
+    assert len(seen) == 1
+
+    reloaded = ConfigStore()
+    reloaded.load()
+    assert reloaded.get("cv.target_fps") == 15.0
+
+
+def test_config_store_validates_and_merges_standards(store):
+    with pytest.raises(ValueError):
+        store.update({"cv.unknown": 1})
+    with pytest.raises(ValueError):
+        store.update({"notifications": "yes"})
+    store.update({"ergonomic.standards": {"neck_angle": {"warning": 20}}})
+    standards = store.get("ergonomic.standards")
+    assert standards["neck_angle"]["warning"] == 20.0
+    assert standards["neck_angle"]["critical"] == 35
+    assert "back_angle" in standards
+
+
+@pytest.mark.parametrize("standards", [
+    {"bogus": {"warning": 1}},
+    {"neck_angle": {"x": 1}},
+    {"neck_angle": {"warning": "20"}},
+    {"neck_angle": {"warning": True}},
+    {"neck_angle": {"warning": float("nan")}},
+])
+def test_config_store_rejects_invalid_standards(store, standards):
+    with pytest.raises(ValueError):
+        store.update({"ergonomic.standards": standards})
+    assert "bogus" not in store.get("ergonomic.standards")
+
+
+def test_detector_rebuilds_model_only_on_model_params(monkeypatch):
+    detector = PoseDetector()
+    rebuilds = []
+    monkeypatch.setattr(detector, "_recreate_pose", lambda: rebuilds.append(detector._model_complexity))
+    detector.apply_config({"cv.target_width": 480, "cv.target_height": 270, "cv.model_complexity": 1})
+    assert rebuilds == []
+    assert detector._target_width == 480
+    detector.apply_config({"cv.model_complexity": 2})
+    assert rebuilds == [2]
+
+
+@pytest.mark.parametrize("key, value", [
+    ("cv.target_width", 0),
+    ("cv.model_complexity", 7),
+    ("cv.model_complexity", 1.5),
+    ("cv.min_detection_confidence", 2.0),
+    ("preview.width", 0),
+    ("session.checkpoint_interval_s", 0),
+    ("cv.target_fps", float("nan")),
+])
+def test_config_store_rejects_out_of_range(store, key, value):
+    before = store.get(key)
+    with pytest.raises(ValueError):
+        store.update({key: value})
+    assert store.get(key) == before
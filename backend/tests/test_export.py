@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from backend.models import db
+from backend.models.export import stream_export
+
+
+@pytest.fixture()
+def history_db(tmp_db):
+    with db.get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO alert_history(alert_type, triggered_at, severity) VALUES(?, ?, ?)",
+            [("neck_forward", f"2024-01-{day:02d} 10:00:00", "warning") for day in range(1, 31)],
+        )
+        conn.commit()
+
+
+def test_export_ndjson_date_range_in_chunks(history_db):
+    chunks = list(stream_export("alert_history", "ndjson", start="2024-01-10", end="2024-01-20", chunk_size=3))
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["triggered_at"][:10] for r in rows] == [f"2024-01-{d}" for d in range(10, 20)]
+    assert rows[0]["alert_type"] == "neck_forward"
+    # 10 filas en bloques de 3 -> 4 bloques
+    assert len(chunks) == 4
+
+
+def test_export_csv_gzip(history_db):
+    body = gzip.decompress(b"".join(stream_export("alert_history", "csv", compress=True, chunk_size=7)))
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows[0] == ["id", "alert_type", "triggered_at", "dismissed_at", "user_action", "effectiveness_score", "severity"]
+    assert len(rows) == 31
+
+
+def test_export_rejects_unknown_table(history_db):
+    with pytest.raises(ValueError):
+        list(stream_export("user_settings_kv"))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.models import db
+from backend.models import ingest
+from backend.models.ingest import ingest_batch
+
+
+def _batch(n: int, offset: int = 0, score: float = 7.0) -> bytes:
+    lines = [
+        json.dumps({"id": i, "start_time": "2024-01-01 10:00:00", "end_time": "2024-01-01 11:00:00",
+                    "average_posture_score": score, "alerts_triggered": i % 3, "breaks_taken": 0})
+        for i in range(offset, offset + n)
+    ]
+    return gzip.compress("\n".join(lines).encode())
+
+
+def test_ingest_deduplicates_and_updates(tmp_db):
+    first = ingest_batch("analysis_sessions", "ws-01", _batch(50))
+    assert (first["received"], first["written"], first["rejected"]) == (50, 50, 0)
+    # Reenvío idéntico: nada que escribir
+    again = ingest_batch("analysis_sessions", "ws-01", _batch(50))
+    assert (again["written"], again["duplicates"]) == (0, 50)
+    # Checkpoint más reciente de 10 sesiones: solo esas se actualizan
+    updated = ingest_batch("analysis_sessions", "ws-01", _batch(10, score=5.0))
+    assert updated["written"] == 10
+    bad = ingest_batch("analysis_sessions", "ws-01", b'{"start_time": "x"}\nnot json\n')
+    assert bad["rejected"] == 2
+
+
+def test_ingest_concurrent_clients(tmp_db):
+    def push(client: str) -> int:
+        # Cada cliente envía 5 lotes solapados (reenvíos parciales)
+        return sum(ingest_batch("analysis_sessions", client, _batch(200, offset=k * 100))["written"] for k in range(5))
+
+    clients = [f"ws-{n:02d}" for n in range(6)]
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        written = list(pool.map(push, clients))
+    assert written == [600] * len(clients)
+    with sqlite3.connect(db.DB_PATH) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM fleet_sessions").fetchone()[0]
+    assert count == 600 * len(clients)
+
+
+def test_decode_batch_caps_plain_and_compressed_bodies(monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_BATCH_BYTES", 1024)
+    with pytest.raises(ValueError, match="batch_too_large"):
+        ingest.decode_batch(b"{}\n" * 400)
+    with pytest.raises(ValueError, match="batch_too_large"):
+        ingest.decode_batch(gzip.compress(b"{}\n" * 400))
+    assert ingest.decode_batch(gzip.compress(b"{}\n" * 10)) == b"{}\n" * 10
+
+
+def test_decode_batch_rejects_corrupt_and_truncated_gzip():
+    with pytest.raises(ValueError, match="invalid_gzip"):
+        ingest.decode_batch(b"\x1f\x8b" + b"\x00" * 32)
+    with pytest.raises(ValueError, match="invalid_gzip"):
+        ingest.decode_batch(gzip.compress(b'{"id": 1}\n' * 50)[:-12])
+
+
+@pytest.mark.parametrize("line", [
+    b'{"id": 1, "start_time": {"nested": true}}',
+    b'{"id": 2, "average_posture_score": [1, 2]}',
+    b'{"id": 3, "alerts_triggered": 99999999999999999999}',
+    b'{"id": Infinity}',
+    b'{"id": 9223372036854775808}',
+])
+def test_ingest_rejects_unstorable_rows(tmp_db, line):
+    report = ingest_batch("analysis_sessions", "ws-01", line + b'\n{"id": 10, "average_posture_score": 7.0}\n')
+    assert (report["received"], report["written"], report["rejected"]) == (2, 1, 1)
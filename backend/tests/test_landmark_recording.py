@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from backend.cv_engine.ergonomic_analyzer import ErgonomicAnalyzer, ERGONOMIC_STANDARDS
+from backend.cv_engine import landmark_recording
+from backend.cv_engine.landmark_recording import (
+    LandmarkRecorder,
+    LandmarkRecording,
+    RECORD,
+    purge_old_recordings,
+    replay,
+    resolve_recordings_dir,
+)
+
+
+def test_recording_roundtrip_and_random_access(tmp_path, dummy_landmarks):
+    path = tmp_path / "s.erglm"
+    lms = dummy_landmarks
+    with LandmarkRecorder(path) as rec:
+        for i in range(10):
+            rec.append(100.0 + i, None if i == 3 else lms)
+    # Reabrir en modo anexado conserva la cabecera
+    with LandmarkRecorder(path) as rec:
+        rec.append(110.0, lms)
+
+    with LandmarkRecording(path) as recording:
+        assert len(recording) == 11
+        assert recording[3] == (103.0, None)
+        ts, landmarks = recording[-1]
+        assert ts == 110.0
+        assert landmarks[11]["x"] == pytest.approx(0.45)
+        assert recording.index_at(104.5) == 5
+
+
+def test_recording_ignores_truncated_tail(tmp_path, dummy_landmarks):
+    path = tmp_path / "s.erglm"
+    with LandmarkRecorder(path) as rec:
+        rec.append(1.0, dummy_landmarks)
+    with open(path, "ab") as fh:
+        fh.write(b"\x00" * (RECORD.size // 2))
+    with LandmarkRecording(path) as recording:
+        assert len(recording) == 1
+
+
+def test_replay_matches_live_analysis(tmp_path, dummy_landmarks):
+    path = tmp_path / "s.erglm"
+    lms = dummy_landmarks
+    with LandmarkRecorder(path) as rec:
+        rec.append(1.0, lms)
+        rec.append(2.0, None)
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    with LandmarkRecording(path) as recording:
+        results = list(replay(recording, analyzer))
+    assert results[0][1]["severity_by_metric"] == analyzer.analyze_pose({"landmarks": lms})["severity_by_metric"]
+    assert results[1] == (2.0, {"overall_severity": "no_pose"})
+
+
+def test_recorder_truncates_torn_tail_before_appending(tmp_path, dummy_landmarks):
+    path = tmp_path / "s.erglm"
+    with LandmarkRecorder(path) as rec:
+        rec.append(1.0, dummy_landmarks)
+    with open(path, "ab") as fh:
+        fh.write(b"\x00" * 100)
+    with LandmarkRecorder(path) as rec:
+        rec.append(2.0, dummy_landmarks)
+        rec.append(3.0, None)
+    with LandmarkRecording(path) as recording:
+        assert [recording.timestamp(i) for i in range(len(recording))] == [1.0, 2.0, 3.0]
+
+
+def test_purge_old_recordings_and_dir_restriction(tmp_path, monkeypatch):
+    old, new = tmp_path / "a" / "old.erglm", tmp_path / "new.erglm"
+    for path in (old, new):
+        LandmarkRecorder(path).close()
+    stale = time.time() - 31 * 86400
+    os.utime(old, (stale, stale))
+    assert purge_old_recordings(30, root=tmp_path) == 1
+    assert not old.exists() and new.exists()
+
+    monkeypatch.setattr(landmark_recording, "DEFAULT_RECORDINGS_DIR", tmp_path)
+    assert resolve_recordings_dir("") == tmp_path.resolve()
+    assert resolve_recordings_dir("team") == (tmp_path / "team").resolve()
+    for bad in ("../outside", "/etc"):
+        with pytest.raises(ValueError):
+            resolve_recordings_dir(bad)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.cv_engine.ergonomic_analyzer import ERGONOMIC_STANDARDS, ErgonomicAnalyzer
+from backend.cv_engine.metric_registry import UP, CORE_METRICS, DEFAULT_REGISTRY, angle_between, angle_from_vertical
+from backend.models.config_store import ConfigStore
+
+NECK_RECO = "Eleva la pantalla a la altura de los ojos y retrae la barbilla"
+ELBOW_RECO = "Ajusta la altura de la silla o el reposabrazos para mantener 90° en codos"
+SHOULDER_RECO = "Relaja hombros y centra el teclado para evitar inclinación lateral"
+
+
+def _pose(lean: float, tilt: float, elbow_y: float, wrist: float) -> list:
+    """Pose sentada determinista: inclinación de cabeza, hombros, codos y muñecas."""
+    lms = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+
+    def put(idx: int, x: float, y: float) -> None:
+        lms[idx] = {"x": x, "y": y, "z": 0.0, "visibility": 1.0}
+
+    put(7, 0.48 + lean, 0.40 - tilt)
+    put(8, 0.52 + lean, 0.40 + tilt)
+    put(11, 0.44, 0.55 + tilt)
+    put(12, 0.56, 0.55 - tilt)
+    put(13, 0.42, elbow_y)
+    put(14, 0.58, elbow_y)
+    put(15, 0.42 + wrist, 0.70 - wrist / 2)
+    put(16, 0.58 - wrist, 0.70 - wrist / 2)
+    put(23, 0.47, 0.78)
+    put(24, 0.53, 0.78)
+    return lms
+
+
+# Salidas fijadas de la implementación previa del analizador (ángulos, severidades y recomendaciones)
+LEGACY_ANALYSES = [
+    (
+        (0.0, 0.0, 0.66, 0.05),
+        {"neck_angle": 0.0, "back_angle": 90.0, "elbow_angle": 96.39, "shoulder_alignment": 0.0},
+        {"neck_angle": "optimal", "back_angle": "acceptable", "elbow_angle": "acceptable", "shoulder_alignment": "optimal"},
+        "acceptable",
+        ["Postura dentro de rangos saludables"],
+    ),
+    (
+        (0.06, 0.01, 0.64, 0.08),
+        {"neck_angle": 21.8, "back_angle": 90.0, "elbow_angle": 91.36, "shoulder_alignment": 9.46},
+        {"neck_angle": "warning", "back_angle": "acceptable", "elbow_angle": "optimal", "shoulder_alignment": "warning"},
+        "warning",
+        [NECK_RECO, SHOULDER_RECO],
+    ),
+    (
+        (0.12, 0.03, 0.62, 0.1),
+        {"neck_angle": 38.66, "back_angle": 90.0, "elbow_angle": 87.76, "shoulder_alignment": 26.57},
+        {"neck_angle": "critical", "back_angle": "acceptable", "elbow_angle": "optimal", "shoulder_alignment": "critical"},
+        "critical",
+        [NECK_RECO, SHOULDER_RECO],
+    ),
+    (
+        (-0.08, -0.02, 0.66, 0.0),
+        {"neck_angle": 28.07, "back_angle": 90.0, "elbow_angle": 169.36, "shoulder_alignment": 18.43},
+        {"neck_angle": "critical", "back_angle": "acceptable", "elbow_angle": "critical", "shoulder_alignment": "critical"},
+        "critical",
+        [NECK_RECO, ELBOW_RECO, SHOULDER_RECO],
+    ),
+]
+
+
+@pytest.mark.parametrize("pose, angles, severity, overall, recommendations", LEGACY_ANALYSES)
+def test_compiled_plan_matches_legacy_analyses(pose, angles, severity, overall, recommendations):
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    assert analyzer.analyze_pose({"landmarks": _pose(*pose)}) == {
+        "angles": angles,
+        "severity_by_metric": severity,
+        "overall_severity": overall,
+        "recommendations": recommendations,
+    }
+
+
+# Primer valor (paso 0.01) de cada severidad en la implementación previa, en orden creciente
+LEGACY_TRANSITIONS = {
+    "neck_angle": [(-40.0, "optimal"), (2.01, "acceptable"), (15.01, "warning"), (25.01, "critical")],
+    "back_angle": [(60.0, "critical"), (80.0, "warning"), (90.0, "acceptable"), (98.0, "optimal")],
+    "elbow_angle": [
+        (50.0, "critical"), (70.0, "warning"), (80.0, "acceptable"), (85.0, "optimal"),
+        (95.01, "acceptable"), (100.01, "warning"), (110.01, "critical"),
+    ],
+    "shoulder_alignment": [(-20.0, "optimal"), (2.01, "acceptable"), (5.01, "warning"), (10.01, "critical")],
+}
+
+
+@pytest.mark.parametrize("metric", sorted(LEGACY_TRANSITIONS))
+def test_threshold_tables_match_legacy_boundaries(metric):
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    previous = None
+    for value, label in LEGACY_TRANSITIONS[metric]:
+        assert analyzer._classify(metric, value) == label, (metric, value)
+        if previous is not None:
+            # Justo antes del límite sigue la severidad anterior
+            assert analyzer._classify(metric, round(value - 0.01, 2)) == previous, (metric, value)
+        previous = label
+
+
+def test_classify_reuses_plan_for_metrics_outside_active_plan():
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS, metrics=["neck_angle"])
+    assert analyzer._classify("elbow_angle", 120.0) == "critical"
+    plan = analyzer._single_plans["elbow_angle"]
+    assert analyzer._classify("elbow_angle", 90.0) == "optimal"
+    assert analyzer._single_plans["elbow_angle"] is plan
+    # Nuevos umbrales invalidan los planes de una métrica
+    analyzer.set_standards({**ERGONOMIC_STANDARDS, "elbow_angle": {"optimal": 120, "acceptable": 110, "warning": 100}})
+    assert analyzer._classify("elbow_angle", 120.0) == "optimal"
+
+
+def test_subset_plan_skips_unneeded_intermediates():
+    full = DEFAULT_REGISTRY.compile(None, ERGONOMIC_STANDARDS)
+    neck = DEFAULT_REGISTRY.compile(["neck_angle"], ERGONOMIC_STANDARDS)
+    assert neck.metric_names == ("neck_angle",)
+    # shoulder_mid, ear_mid, neck_vec
+    assert neck.n_intermediates == 3
+    assert full.n_intermediates > neck.n_intermediates
+    with pytest.raises(ValueError):
+        DEFAULT_REGISTRY.compile(["unknown"], ERGONOMIC_STANDARDS)
+
+
+def test_optional_metrics_are_opt_in():
+    detection = {"landmarks": _pose(0.06, 0.01, 0.64, 0.08)}
+    analyzer = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    assert tuple(analyzer.analyze_pose(detection)["angles"]) == CORE_METRICS
+
+    analyzer.set_metrics(CORE_METRICS + ("wrist_deviation", "head_tilt"))
+    res = analyzer.analyze_pose(detection)
+    assert 0.0 <= res["angles"]["head_tilt"] <= 90.0
+    assert res["severity_by_metric"]["wrist_deviation"] in {"optimal", "acceptable", "warning", "critical"}
+
+
+def test_extra_metrics_config_validates_names(tmp_db):
+    store = ConfigStore()
+    assert store.update({"ergonomic.extra_metrics": ["head_tilt", "head_tilt"]}) == {
+        "ergonomic.extra_metrics": ["head_tilt"]
+    }
+    with pytest.raises(ValueError):
+        store.update({"ergonomic.extra_metrics": ["not_a_metric"]})
+
+
+@pytest.mark.parametrize("vec", [(0.0, -1.0), (0.0, 1.0), (0.3, -0.4), (-0.02, 0.15), (1e-9, 0.0), (0.0, 0.0)])
+def test_angle_from_vertical_matches_angle_between_up(vec):
+    assert angle_from_vertical(vec) == angle_between(vec, UP)
+
+
+def test_compute_accepts_integer_coordinates():
+    lms = _pose(0.0, 0.0, 0.66, 0.05)
+    lms[11] = {"x": 0, "y": 1, "z": 0, "visibility": 1}
+    plan = DEFAULT_REGISTRY.compile(None, ERGONOMIC_STANDARDS)
+    as_float = [dict(lm, x=float(lm["x"]), y=float(lm["y"])) for lm in lms]
+    assert plan.compute(lms) == plan.compute(as_float)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from backend.cv_engine.preview import PreviewBroadcaster
+
+
+def test_preview_encodes_only_with_viewers_and_throttles(monkeypatch):
+    preview = PreviewBroadcaster(width=320, fps=5.0)
+    encodes = []
+    monkeypatch.setattr(preview, "_encode", lambda frame, det: encodes.append(frame) or b"jpeg")
+
+    # Sin espectadores no hay trabajo
+    assert not preview.maybe_publish("frame", None, now=0.0)
+    assert encodes == []
+
+    preview.add_viewer()
+    preview.add_viewer()
+    assert preview.maybe_publish("f1", None, now=1.0)
+    # Dentro del intervalo de 1/fps no se vuelve a codificar
+    assert not preview.maybe_publish("f2", None, now=1.1)
+    assert preview.maybe_publish("f3", None, now=1.25)
+    assert encodes == ["f1", "f3"]
+    # Ambos espectadores comparten los mismos bytes
+    assert preview.latest() == (2, b"jpeg")
+
+    preview.remove_viewer()
+    preview.remove_viewer()
+    assert preview.latest() == (2, None)
+    assert not preview.maybe_publish("f4", None, now=5.0)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sqlite3
+
+from backend.cv_engine.session_ledger import SessionLedger
+from backend.models import db
+
+
+def test_ledger_incremental_average_and_breaks():
+    ledger = SessionLedger(start_ts=0.0, checkpoint_interval_s=10.0, break_min_s=5.0)
+    ledger.observe({"severity_by_metric": {"neck_angle": "optimal", "back_angle": "optimal", "elbow_angle": "optimal"}}, now=1.0)
+    ledger.observe({"severity_by_metric": {"neck_angle": "critical", "back_angle": "critical", "elbow_angle": "critical"}}, now=2.0, alerts_entered=2)
+    # Ausencia de pose de 6s: una sola pausa aunque siga sin pose
+    for t in range(3, 12):
+        ledger.observe({"overall_severity": "no_pose"}, now=float(t))
+    summary = ledger.summary()
+    assert summary["average_posture_score"] == 6.25
+    assert summary["alerts_triggered"] == 2
+    assert summary["breaks_taken"] == 1
+    assert summary["end_ts"] == 11.0
+    assert ledger.checkpoint_due(11.0)
+
+
+def test_upsert_session_summary_updates_in_place(tmp_db):
+    sid = db.upsert_session_summary(None, "2024-01-01 10:00:00", "2024-01-01 10:00:15", 8.0, 0, 0)
+    assert db.upsert_session_summary(sid, "2024-01-01 10:00:00", "2024-01-01 10:30:00", 7.5, 3, 1) == sid
+    with sqlite3.connect(db.DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT start_time, end_time, average_posture_score, alerts_triggered, breaks_taken FROM analysis_sessions"
+        ).fetchall()
+    assert rows == [("2024-01-01 10:00:00", "2024-01-01 10:30:00", 7.5, 3, 1)]
+
+
+def test_init_db_marks_legacy_sessions_finalized(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "test.db")
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute(
+            "CREATE TABLE analysis_sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, start_time TIMESTAMP, "
+            "end_time TIMESTAMP, average_posture_score REAL, alerts_triggered INTEGER, breaks_taken INTEGER)"
+        )
+        conn.execute("INSERT INTO analysis_sessions(start_time, end_time) VALUES('2024-01-01 10:00:00', '2024-01-01 11:00:00')")
+    db.init_db()
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute("SELECT finalized FROM analysis_sessions").fetchall() == [(1,)]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from backend.cv_engine import session_manager
+from backend.cv_engine.session_manager import CVSessionManager
+from backend.cv_engine.synthetic_source import SyntheticPoseDetector
+from backend.models import db
+
+
+def _wait_op(session: CVSessionManager, op_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        op = session.get_operation(op_id)
+        if op["status"] != "pending":
+            return op
+        time.sleep(0.01)
+    raise AssertionError(f"operation {op_id} still pending")
+
+
+def _wait_state(session: CVSessionManager, state: str, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while session.get_status()["state"] != state:
+        if time.time() > deadline:
+            raise AssertionError(f"state {session.get_status()['state']} != {state}")
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def session(tmp_db):
+    s = CVSessionManager()
+    s.detector = SyntheticPoseDetector(inference_ms=1.0, busy=False)
+    yield s
+    s.stop()
+
+
+def test_async_start_calibrate_stop(session):
+    op = session.start_async()
+    assert op["status"] == "pending"
+    assert _wait_op(session, op["id"])["result"] == {"started": True}
+
+    cal = session.calibrate_async(frames=5)
+    done = _wait_op(session, cal["id"])
+    assert done["result"]["frames"] == 5
+    assert set(done["result"]["baseline"]) == {"neck_angle", "back_angle", "elbow_angle", "shoulder_alignment"}
+
+    stop = session.stop_async()
+    assert _wait_op(session, stop["id"])["status"] == "done"
+    states = [e["state"] for e in session.events.since(0) if e["type"] == "session_state"]
+    assert states == ["opening", "warming", "running", "stopping", "idle"]
+    assert session.get_status()["state"] == "idle"
+
+
+def test_async_start_reports_camera_failure(session, monkeypatch):
+    monkeypatch.setattr(session.detector, "start_camera", lambda index=0: False)
+    op = _wait_op(session, session.start_async()["id"])
+    assert (op["status"], op["error"]) == ("failed", "camera_open_failed")
+    assert session.get_status()["state"] == "failed"
+
+
+def test_calibrate_requires_running_session(session):
+    op = session.calibrate_async(frames=3)
+    assert (op["status"], op["error"]) == ("failed", "not_running")
+
+
+def test_session_row_created_at_start_and_finalized_on_stop(session):
+    session.start()
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute("SELECT finalized FROM analysis_sessions").fetchall() == [(0,)]
+    session.stop()
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute("SELECT finalized FROM analysis_sessions").fetchall() == [(1,)]
+
+
+def test_loop_survives_config_apply_failure(session, monkeypatch):
+    session.start()
+    _wait_state(session, "running")
+
+    def boom(changes):
+        raise RuntimeError("bad config")
+
+    monkeypatch.setattr(session.detector, "apply_config", boom)
+    session._on_config_change({"cv.target_width": 480}, 2)
+    seq = session.analysis_version()[0]
+    deadline = time.time() + 2.0
+    while session.analysis_version()[0] <= seq + 3 and time.time() < deadline:
+        time.sleep(0.01)
+    status = session.get_status()
+    assert status["state"] == "running" and status["running"]
+    assert status["last_error"].startswith("config_apply_failed")
+    assert session.analysis_version()[0] > seq + 3
+
+
+def test_concurrent_starts_launch_a_single_loop(session, monkeypatch):
+    open_camera = session.detector.start_camera
+
+    def slow_open(index=0):
+        time.sleep(0.2)
+        return open_camera(index)
+
+    monkeypatch.setattr(session.detector, "start_camera", slow_open)
+    threads = [threading.Thread(target=session.start) for _ in range(2)]
+    threads.append(threading.Thread(target=session.start_async))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _wait_state(session, "running")
+    assert sum(1 for t in threading.enumerate() if t.name == "cv_loop") == 1
+
+
+def test_warmup_timeout_fails_start_without_frames(session, monkeypatch):
+    monkeypatch.setattr(session_manager, "WARMUP_TIMEOUT_S", 0.2)
+    monkeypatch.setattr(session.detector, "read", lambda: (False, None))
+    op = _wait_op(session, session.start_async()["id"])
+    assert (op["status"], op["error"]) == ("failed", "warmup_timeout")
+    status = session.get_status()
+    assert (status["state"], status["running"]) == ("failed", False)
+
+
+def test_calibration_deadline_checked_without_frames(session, monkeypatch):
+    session.start()
+    _wait_state(session, "running")
+    monkeypatch.setattr(session.detector, "read", lambda: (False, None))
+    op = _wait_op(session, session.calibrate_async(frames=1000, timeout_s=0.2)["id"], timeout=2.0)
+    assert (op["status"], op["error"]) == ("failed", "timeout")
+
+
+def test_stop_before_pending_start_worker_keeps_camera_closed(session):
+    # El stop toma el cerrojo de ciclo de vida antes que el worker de un start asíncrono
+    with session._lifecycle_lock:
+        op = session.start_async()
+        session._set_state("stopping")
+        with session._lock:
+            session._running = False
+        session._teardown()
+        session._set_state("idle")
+    session._start_thread.join(timeout=5.0)
+    assert (session.get_operation(op["id"])["status"], session.get_operation(op["id"])["error"]) == ("failed", "stopped")
+    status = session.get_status()
+    assert (status["state"], status["running"]) == ("idle", False)
+    assert not any(t.name == "cv_loop" for t in threading.enumerate())
+
+
+def test_recording_purge_runs_outside_state_lock(session, monkeypatch, tmp_path):
+    held = []
+    monkeypatch.setattr(session_manager, "purge_old_recordings", lambda days: held.append(session._lock.locked()))
+    session._recording_dir = tmp_path
+    # Cambio de configuración y apertura de sesión: ambos purgan, ninguno con `_lock` tomado
+    session._on_config_change({"recording.enabled": True}, 1)
+    session.start()
+    _wait_state(session, "running")
+    session.stop()
+    assert held == [False, False]
+    assert len(list(tmp_path.glob("*.erglm"))) == 1
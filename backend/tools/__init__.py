@@ -0,0 +1,4 @@
+__all__ = ["bench_metrics", "ws_loadtest"]
+
+
+
@@ -0,0 +1,298 @@
+"""Benchmark del registro de métricas compilado frente a la ruta previa de `ErgonomicAnalyzer`.
+
+`LegacyAnalyzer` es una copia literal de la implementación anterior (cálculo de ángulos con
+helpers locales, `_classify` con cadenas de `if` y recomendaciones por conjuntos de strings);
+se mantiene aquí como referencia de rendimiento y de equivalencia de resultados.
+
+Uso::
+
+    python -m backend.tools.bench_metrics --iterations 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.cv_engine.ergonomic_analyzer import (
+    ERGONOMIC_STANDARDS,
+    ErgonomicAnalyzer,
+    LEFT_EAR,
+    LEFT_ELBOW,
+    LEFT_HIP,
+    LEFT_SHOULDER,
+    LEFT_WRIST,
+    RIGHT_EAR,
+    RIGHT_ELBOW,
+    RIGHT_HIP,
+    RIGHT_SHOULDER,
+    RIGHT_WRIST,
+)
+from backend.cv_engine.metric_registry import CORE_METRICS, DEFAULT_REGISTRY
+
+
+class LegacyAnalyzer:
+    """Ruta de análisis previa al registro de métricas (solo para comparación)."""
+
+    def __init__(self, standards: Dict[str, Dict[str, float]]) -> None:
+        self.standards = standards
+        self._baseline: Dict[str, float] = {}
+
+    def analyze_pose(self, detection: Dict[str, Any]) -> Dict[str, Any]:
+        """Devuelve análisis con severidades y recomendaciones.
+
+        Parameters
+        ----------
+        detection: Dict[str, Any]
+            Estructura que contiene `landmarks` como lista de dicts {x,y,z,visibility}.
+        """
+        landmarks = detection.get("landmarks")
+        if not landmarks:
+            return {"severity": "no_pose", "message": "No se detectó postura"}
+
+        angles = self.calculate_angles(landmarks)
+        severity_by_metric = {k: self._classify(k, v) for k, v in angles.items()}
+        overall = self._max_severity(list(severity_by_metric.values()))
+        recs = self.generate_recommendations({"angles": angles, "severity_by_metric": severity_by_metric})
+        return {
+            "angles": angles,
+            "severity_by_metric": severity_by_metric,
+            "overall_severity": overall,
+            "recommendations": recs,
+        }
+
+    def calculate_angles(self, landmarks: List[Dict[str, float]]) -> Dict[str, float]:
+        """Calcula métricas principales: cuello, espalda, codos y alineación de hombros.
+
+        Los ángulos se devuelven en grados.
+        """
+        # Helpers
+        def get_xy(idx: int) -> Tuple[float, float]:
+            lm = landmarks[idx]
+            return float(lm["x"]), float(lm["y"])
+
+        def vector(a: Tuple[float, float], b: Tuple[float, float]) -> Tuple[float, float]:
+            return (b[0] - a[0], b[1] - a[1])
+
+        def angle_between(u: Tuple[float, float], v: Tuple[float, float]) -> float:
+            ux, uy = u
+            vx, vy = v
+            dot = ux * vx + uy * vy
+            nu = math.hypot(ux, uy)
+            nv = math.hypot(vx, vy)
+            if nu == 0 or nv == 0:
+                return 0.0
+            cosang = max(-1.0, min(1.0, dot / (nu * nv)))
+            return math.degrees(math.acos(cosang))
+
+        # Puntos clave
+        ls = get_xy(LEFT_SHOULDER)
+        rs = get_xy(RIGHT_SHOULDER)
+        le = get_xy(LEFT_ELBOW)
+        re = get_xy(RIGHT_ELBOW)
+        lw = get_xy(LEFT_WRIST)
+        rw = get_xy(RIGHT_WRIST)
+        lh = get_xy(LEFT_HIP)
+        rh = get_xy(RIGHT_HIP)
+        learp = get_xy(LEFT_EAR)
+        rearp = get_xy(RIGHT_EAR)
+
+        shoulder_mid = ((ls[0] + rs[0]) / 2.0, (ls[1] + rs[1]) / 2.0)
+        hip_mid = ((lh[0] + rh[0]) / 2.0, (lh[1] + rh[1]) / 2.0)
+        ear_mid = ((learp[0] + rearp[0]) / 2.0, (learp[1] + rearp[1]) / 2.0)
+
+        # 1) Neck angle: vector hombros->orejas vs eje vertical hacia arriba (0, -1)
+        neck_vec = vector(shoulder_mid, ear_mid)
+        neck_angle = angle_between(neck_vec, (0.0, -1.0))
+
+        # 2) Back angle (escala OSHA ~70-100):
+        # Tomamos el vector tronco = caderas->hombros. Su desviación vs vertical = dv.
+        # Mapeamos a 90 +/- dv según signo (reclinación vs encorvamiento) empleando
+        # la relación de la cabeza respecto a las caderas para estimar el signo.
+        trunk_vec = vector(hip_mid, shoulder_mid)
+        dv = angle_between(trunk_vec, (0.0, -1.0))
+        # Signo aproximado: si la cabeza está más adelantada en X que las caderas, asumimos encorvado
+        sign = 1.0
+        if abs(ear_mid[0] - hip_mid[0]) > 0.02:
+            sign = -1.0 if ear_mid[0] > hip_mid[0] else 1.0
+        back_angle = 90.0 + sign * dv
+        back_angle = max(60.0, min(110.0, back_angle))
+
+        # 3) Elbow angles (promedio izquierda/derecha)
+        def joint_angle(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> float:
+            # Ángulo en b formado por a-b-c
+            ab = vector(b, a)
+            cb = vector(b, c)
+            return angle_between(ab, cb)
+
+        elbow_left = joint_angle(ls, le, lw)
+        elbow_right = joint_angle(rs, re, rw)
+        elbow_angle = (elbow_left + elbow_right) / 2.0
+
+        # 4) Shoulder alignment: ángulo de la línea entre hombros vs horizontal (en grados)
+        shoulder_vec = vector(ls, rs)
+        shoulder_alignment = abs(math.degrees(math.atan2(shoulder_vec[1], shoulder_vec[0])))
+
+        return {
+            "neck_angle": round(neck_angle, 2),
+            "back_angle": round(back_angle, 2),
+            "elbow_angle": round(elbow_angle, 2),
+            "shoulder_alignment": round(shoulder_alignment, 2),
+        }
+
+    def generate_recommendations(self, analysis: Dict[str, Any]) -> List[str]:
+        recs: List[str] = []
+        angles = analysis["angles"]
+        sev = analysis["severity_by_metric"]
+        if sev.get("neck_angle") in {"warning", "critical"}:
+            recs.append("Eleva la pantalla a la altura de los ojos y retrae la barbilla")
+        if sev.get("back_angle") in {"warning", "critical"}:
+            recs.append("Apoya la zona lumbar y reclina el respaldo ligeramente (95°–110°)")
+        if sev.get("elbow_angle") in {"warning", "critical"}:
+            recs.append("Ajusta la altura de la silla o el reposabrazos para mantener 90° en codos")
+        if sev.get("shoulder_alignment") in {"warning", "critical"}:
+            recs.append("Relaja hombros y centra el teclado para evitar inclinación lateral")
+        if not recs and self._baseline:
+            recs.append("Mantén tu postura actual; dentro de tu calibración personal")
+        if not recs:
+            recs.append("Postura dentro de rangos saludables")
+        return recs
+
+    # ------------------------ utilidades internas ------------------------
+    def _classify(self, metric: str, value: float) -> str:
+        s = self.standards.get(metric, {})
+        if metric == "back_angle":
+            # Cuanto más cercano a 100 mejor; 90 aceptable; <80 warning; <70 critical
+            if value >= s.get("optimal", 100) - 2:
+                return "optimal"
+            if value >= s.get("acceptable", 90):
+                return "acceptable"
+            if value >= s.get("warning", 80):
+                return "warning"
+            return "critical"
+        else:
+            # Métricas donde 0 es óptimo y mayor es peor (cuello y hombros),
+            # y codo donde óptimo ~90 y desviaciones grandes son peores.
+            if metric == "elbow_angle":
+                delta = abs(value - self.standards[metric]["optimal"])
+                if delta <= 5:
+                    return "optimal"
+                if delta <= 10:
+                    return "acceptable"
+                if delta <= 20:
+                    return "warning"
+                return "critical"
+            # neck_angle / shoulder_alignment
+            if value <= s.get("acceptable", 15):
+                if value <= s.get("optimal", 0) + 2:
+                    return "optimal"
+                return "acceptable"
+            if value <= s.get("warning", 25):
+                return "warning"
+            return "critical"
+
+    def _max_severity(self, severities: List[str]) -> str:
+        order = {"optimal": 0, "acceptable": 1, "warning": 2, "critical": 3}
+        return max(severities, key=lambda s: order.get(s, -1))
+
+
+def random_landmarks(rng: random.Random) -> List[Dict[str, float]]:
+    """Pose sentada plausible con ruido: 33 landmarks normalizados."""
+    lms = [{"x": rng.uniform(0.3, 0.7), "y": rng.uniform(0.3, 0.8), "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    lean = rng.uniform(-0.08, 0.12)
+    tilt = rng.uniform(-0.03, 0.03)
+
+    def put(idx: int, x: float, y: float) -> None:
+        lms[idx] = {"x": x + rng.gauss(0, 0.005), "y": y + rng.gauss(0, 0.005), "z": 0.0, "visibility": 1.0}
+
+    put(LEFT_EAR, 0.48 + lean, 0.40 - tilt)
+    put(RIGHT_EAR, 0.52 + lean, 0.40 + tilt)
+    put(LEFT_SHOULDER, 0.44, 0.55 + tilt)
+    put(RIGHT_SHOULDER, 0.56, 0.55 - tilt)
+    put(LEFT_ELBOW, 0.42, 0.66)
+    put(RIGHT_ELBOW, 0.58, 0.66)
+    put(LEFT_WRIST, 0.42 + rng.uniform(0.0, 0.1), 0.70 - rng.uniform(0.0, 0.06))
+    put(RIGHT_WRIST, 0.58 - rng.uniform(0.0, 0.1), 0.70 - rng.uniform(0.0, 0.06))
+    put(LEFT_HIP, 0.47, 0.78)
+    put(RIGHT_HIP, 0.53, 0.78)
+    return lms
+
+
+def _time(fn: Callable[[Dict[str, Any]], Any], detections: List[Dict[str, Any]], iterations: int) -> float:
+    n = len(detections)
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(detections[i % n])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _time_interleaved(
+    cases: Dict[str, Tuple[Callable[[Any], Any], List[Any]]], iterations: int, rounds: int
+) -> Dict[str, float]:
+    """µs por llamada de cada caso: mínimo de `rounds` rondas alternando los casos.
+
+    Alternar en cada ronda reparte por igual entre los casos el ruido de la máquina (frecuencia
+    de CPU, otros procesos); el mínimo descarta las rondas perturbadas.
+    """
+    best: Dict[str, float] = {}
+    for _ in range(rounds):
+        for name, (fn, inputs) in cases.items():
+            us = _time(fn, inputs, iterations)
+            best[name] = min(best.get(name, us), us)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Compara el plan de métricas compilado con la ruta previa")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--rounds", type=int, default=7, help="rondas alternadas; se informa el mínimo")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    detections = [{"landmarks": random_landmarks(rng)} for _ in range(512)]
+    legacy = LegacyAnalyzer(ERGONOMIC_STANDARDS)
+    core = ErgonomicAnalyzer(ERGONOMIC_STANDARDS)
+    full = ErgonomicAnalyzer(ERGONOMIC_STANDARDS, metrics=DEFAULT_REGISTRY.metric_names)
+    subset = ErgonomicAnalyzer(ERGONOMIC_STANDARDS, metrics=("neck_angle",))
+
+    mismatches = sum(1 for d in detections if legacy.analyze_pose(d) != core.analyze_pose(d))
+    landmark_sets = [d["landmarks"] for d in detections]
+    angle_sets = [core.calculate_angles(lms) for lms in landmark_sets]
+    timings = _time_interleaved({
+        "legacy_4_metrics": (legacy.analyze_pose, detections),
+        "compiled_4_metrics": (core.analyze_pose, detections),
+        f"compiled_{len(DEFAULT_REGISTRY.metric_names)}_metrics": (full.analyze_pose, detections),
+        "compiled_1_metric": (subset.analyze_pose, detections),
+        "angles_legacy": (legacy.calculate_angles, landmark_sets),
+        "angles_compiled": (core.calculate_angles, landmark_sets),
+        "classify_legacy": (lambda d: [legacy._classify(k, v) for k, v in d.items()], angle_sets),
+        "classify_compiled": (core.classify, angle_sets),
+    }, args.iterations, args.rounds)
+    report = {
+        "iterations": args.iterations,
+        "rounds": args.rounds,
+        "equivalent_outputs": mismatches == 0,
+        "mismatches": mismatches,
+        "us_per_analysis": {
+            name: round(us, 2) for name, us in timings.items() if not name.startswith(("angles_", "classify_"))
+        },
+        "us_per_calculate_angles": {
+            "legacy": round(timings["angles_legacy"], 2),
+            "compiled": round(timings["angles_compiled"], 2),
+        },
+        "us_per_classification": {
+            "legacy": round(timings["classify_legacy"], 3),
+            "compiled": round(timings["classify_compiled"], 3),
+        },
+        "core_metrics": list(CORE_METRICS),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
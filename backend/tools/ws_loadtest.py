@@ -0,0 +1,308 @@
+"""Prueba de carga del fan-out WebSocket/HTTP del backend.
+
+El servidor (uvicorn + bucle de CV con `SyntheticPoseDetector` en lugar de la cámara) corre en un
+proceso hijo; los clientes WebSocket/HTTP corren en este proceso. Así la CPU, la memoria y los fps
+medidos son solo del servidor y no incluyen el coste de los clientes ni compiten por su GIL.
+
+```
+ proceso de prueba                           proceso servidor (--serve)
+ clientes WS (N) ──┐                       ┌── uvicorn (event loop)
+ clientes HTTP (M) ┼──── 127.0.0.1 ───────▶┤
+ muestreo fps ─────┘                       └── hilo cv_loop (SyntheticPoseDetector)
+ muestreo CPU/RSS del pid hijo (/proc o psutil)
+```
+
+Uso::
+
+    python -m backend.tools.ws_loadtest --ws-clients 300 --http-clients 20 --duration 30 \\
+        --output loadtest-report.json
+
+Notas de medición:
+- Latencia de entrega = recepción en el cliente - `ts` del análisis (momento del análisis).
+- CPU y RSS se leen del proceso servidor; los fps, de `/api/cv/camera-status`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 2)}
+
+
+def _proc_usage(pid: int) -> Tuple[Optional[float], Optional[float]]:
+    """(segundos de CPU, RSS en MB) de otro proceso; `None` si la plataforma no lo permite."""
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            fields = fh.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as fh:
+            pages = int(fh.read().split()[1])
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return cpu, round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return None, None
+    try:
+        proc = psutil.Process(pid)
+        times = proc.cpu_times()
+        return times.user + times.system, round(proc.memory_info().rss / (1024 * 1024), 1)
+    except psutil.Error:
+        return None, None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.messages = 0
+        self.unique = 0
+        self.errors = 0
+        self.latencies_ms: List[float] = []
+
+
+async def _ws_client(url: str, stop_at: float, stats: _Stats) -> None:
+    import websockets
+
+    last_seq = None
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while time.time() < stop_at:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(0.1, stop_at - time.time()))
+                except asyncio.TimeoutError:
+                    break
+                received = time.time()
+                msg = json.loads(raw)
+                stats.messages += 1
+                seq = msg.get("seq")
+                if seq is not None and seq != last_seq:
+                    stats.unique += 1
+                    last_seq = seq
+                    if msg.get("ts"):
+                        stats.latencies_ms.append((received - msg["ts"]) * 1000.0)
+    except Exception:
+        stats.errors += 1
+
+
+async def _http_get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> bytes:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    headers = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in headers.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return await reader.readexactly(length) if length else b""
+
+
+async def _http_client(port: int, paths: List[str], stop_at: float, stats: _Stats) -> None:
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        stats.errors += 1
+        return
+    i = 0
+    try:
+        while time.time() < stop_at:
+            t0 = time.perf_counter()
+            await _http_get(reader, writer, paths[i % len(paths)])
+            stats.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+            stats.messages += 1
+            i += 1
+            await asyncio.sleep(0.1)
+    except Exception:
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+def _request(port: int, path: str, method: str = "GET", timeout: float = 2.0) -> Dict[str, Any]:
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+async def _sample_server(port: int, pid: int, stop_at: float, interval: float, out: Dict[str, List[float]]) -> None:
+    # Muestreo del servidor: fps del bucle de CV (HTTP) y RSS del proceso hijo
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.time() < stop_at:
+            await asyncio.sleep(interval)
+            status = json.loads(await _http_get(reader, writer, "/api/cv/camera-status"))
+            out["fps"].append(float(status.get("fps") or 0.0))
+            rss = _proc_usage(pid)[1]
+            if rss is not None:
+                out["rss"].append(rss)
+    finally:
+        writer.close()
+
+
+async def _run(args: argparse.Namespace, port: int, pid: int) -> Dict[str, Any]:
+    # Referencia: fps y CPU del servidor sin clientes
+    baseline: Dict[str, List[float]] = {"fps": [], "rss": []}
+    cpu_b0, wall_b0 = _proc_usage(pid)[0], time.perf_counter()
+    await _sample_server(port, pid, time.time() + args.warmup, 0.5, baseline)
+    cpu_b1, wall_b1 = _proc_usage(pid)[0], time.perf_counter()
+
+    cpu0, wall0 = _proc_usage(pid)[0], time.perf_counter()
+    stop_at = time.time() + args.duration
+    ws_stats = [_Stats() for _ in range(args.ws_clients)]
+    http_stats = [_Stats() for _ in range(args.http_clients)]
+    under_load: Dict[str, List[float]] = {"fps": [], "rss": []}
+
+    url = f"ws://127.0.0.1:{port}/api/cv/stream"
+    tasks = [_ws_client(url, stop_at, st) for st in ws_stats]
+    http_paths = ["/api/cv/current-analysis", "/api/cv/camera-status"]
+    tasks += [_http_client(port, http_paths, stop_at, st) for st in http_stats]
+    tasks += [_sample_server(port, pid, stop_at, 1.0, under_load)]
+    await asyncio.gather(*tasks)
+    cpu1, wall1 = _proc_usage(pid)[0], time.perf_counter()
+
+    def cpu_percent(c0: Optional[float], c1: Optional[float], w0: float, w1: float) -> Optional[float]:
+        if c0 is None or c1 is None or w1 <= w0:
+            return None
+        return round(100.0 * (c1 - c0) / (w1 - w0), 1)
+
+    def summarize(stats: List[_Stats], unique: bool) -> Dict[str, Any]:
+        rates = [st.messages / args.duration for st in stats]
+        out: Dict[str, Any] = {
+            "clients": len(stats),
+            "errors": sum(st.errors for st in stats),
+            "messages_total": sum(st.messages for st in stats),
+            "rate_per_client": {
+                "mean": round(statistics.fmean(rates), 2) if rates else None,
+                "min": round(min(rates), 2) if rates else None,
+            },
+            "latency_ms": _percentiles([lat for st in stats for lat in st.latencies_ms]),
+        }
+        if unique:
+            out["unique_analyses_total"] = sum(st.unique for st in stats)
+        return out
+
+    fps = under_load["fps"]
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "output")},
+        "websocket": summarize(ws_stats, unique=True),
+        "http": summarize(http_stats, unique=False),
+        "cv_loop": {
+            "baseline_fps": round(statistics.fmean(baseline["fps"]), 2) if baseline["fps"] else None,
+            "under_load_fps_mean": round(statistics.fmean(fps), 2) if fps else None,
+            "under_load_fps_min": round(min(fps), 2) if fps else None,
+        },
+        "server_process": {
+            "cpu_percent_of_one_core_baseline": cpu_percent(cpu_b0, cpu_b1, wall_b0, wall_b1),
+            "cpu_percent_of_one_core_under_load": cpu_percent(cpu0, cpu1, wall0, wall1),
+            "rss_mb_baseline": max(baseline["rss"]) if baseline["rss"] else None,
+            "rss_mb_peak": max(under_load["rss"]) if under_load["rss"] else None,
+            "rss_mb_end": _proc_usage(pid)[1],
+        },
+    }
+
+
+def _serve(args: argparse.Namespace) -> None:
+    """Proceso servidor: app real con `SyntheticPoseDetector`; la sesión se inicia por HTTP."""
+    import uvicorn
+
+    from backend.main import app
+    from backend.cv_engine.session_manager import cv_session
+    from backend.cv_engine.synthetic_source import SyntheticPoseDetector
+
+    cv_session.detector = SyntheticPoseDetector(inference_ms=args.inference_ms)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def _wait_ready(port: int, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited during startup (code {proc.returncode})")
+        try:
+            _request(port, "/health", timeout=0.5)
+            return
+        except (urllib.error.URLError, OSError, ValueError):
+            time.sleep(0.1)
+    raise RuntimeError(f"server not ready after {timeout:.0f}s")
+
+
+def _wait_running(port: int, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if _request(port, "/api/cv/camera-status").get("state") == "running":
+            return
+        time.sleep(0.1)
+    raise RuntimeError("cv session did not reach running")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Prueba de carga de /api/cv/stream y /api/cv/*")
+    parser.add_argument("--ws-clients", type=int, default=200)
+    parser.add_argument("--http-clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos bajo carga")
+    parser.add_argument("--warmup", type=float, default=3.0, help="segundos de referencia sin clientes")
+    parser.add_argument("--inference-ms", type=float, default=8.0, help="coste simulado por frame")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="loadtest-report.json")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args)
+        return {}
+
+    port = _free_port()
+    # BD temporal: la prueba no debe tocar el historial real (DB_PATH se resuelve al importar)
+    env = dict(os.environ)
+    env.setdefault("ERGONOMIC_DB", os.path.join(tempfile.mkdtemp(), "loadtest.db"))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.tools.ws_loadtest", "--serve", "--port", str(port),
+         "--inference-ms", str(args.inference_ms)],
+        env=env,
+    )
+    try:
+        _wait_ready(port, proc, args.startup_timeout)
+        _request(port, "/api/cv/start-session", method="POST")
+        _wait_running(port, args.startup_timeout)
+        report = asyncio.run(_run(args, port, proc.pid))
+        _request(port, "/api/cv/stop-session", method="POST")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ let mainWindow: BrowserWindow | null = null;
 const pythonManager = new PythonManager();
 let tray: Tray | null = null;
 let monitoring = false;
+let previewWindow: BrowserWindow | null = null;
 
 function createWindow() {
   mainWindow = new BrowserWindow({
@@ -83,6 +84,36 @@ function setupIPC() {
   });
 }
 
+/**
+ * Vista previa de cámara para soporte (menú de bandeja). Habilita `preview.enabled` con el
+ * token local y abre el stream MJPEG en una ventana propia, sin preload ni acceso al renderer
+ * principal; al cerrarla se vuelve a deshabilitar. El token nunca llega al renderer.
+ */
+async function openSupportPreview() {
+  if (previewWindow) {
+    previewWindow.focus();
+    return;
+  }
+  try {
+    await pythonManager.setLocalConfig({ 'preview.enabled': true });
+  } catch (e) {
+    dialog.showErrorBox('Vista previa no disponible', String(e));
+    return;
+  }
+  previewWindow = new BrowserWindow({
+    width: 400,
+    height: 260,
+    title: 'Vista previa de cámara (soporte)',
+    webPreferences: { contextIsolation: true, nodeIntegration: false, sandbox: true }
+  });
+  previewWindow.setMenuBarVisibility(false);
+  previewWindow.loadURL(pythonManager.getPreviewUrl());
+  previewWindow.on('closed', () => {
+    previewWindow = null;
+    pythonManager.setLocalConfig({ 'preview.enabled': false }).catch(() => {});
+  });
+}
+
 function configureAutoLaunch(enabled: boolean) {
   try {
     app.setLoginItemSettings({
@@ -118,6 +149,7 @@ function updateTrayMenu() {
     { label: 'Tomar descanso', click: () => mainWindow?.webContents.send('tray-break') },
     { type: 'separator' },
     { label: 'Ajustes', click: () => { if (mainWindow) { mainWindow.show(); mainWindow.webContents.send('open-settings'); } } },
+    { label: 'Vista previa de cámara (soporte)', click: () => { void openSupportPreview(); } },
     { label: 'Salir', click: () => app.quit() }
   ];
   const menu = Menu.buildFromTemplate(template);
@@ -3,12 +3,15 @@ import path from 'node:path';
 import os from 'node:os';
 import http from 'node:http';
 import fs from 'node:fs';
+import crypto from 'node:crypto';
 
 const DEFAULT_PORT = Number(process.env.BACKEND_PORT || 5175);
 
 export class PythonManager {
   private process: ChildProcessWithoutNullStreams | null = null;
   private port: number;
+  // Token por arranque: habilita claves locales (p. ej. `preview.enabled`) y la vista previa
+  private localToken = crypto.randomBytes(32).toString('base64url');
 
   constructor(port = DEFAULT_PORT) {
     this.port = port;
@@ -58,7 +61,8 @@ export class PythonManager {
         env: {
           ...process.env,
           PYTHONUNBUFFERED: '1',
-          BACKEND_PORT: String(this.port)
+          BACKEND_PORT: String(this.port),
+          ERGONOMIC_LOCAL_TOKEN: this.localToken
         }
       }
     );
@@ -108,6 +112,32 @@ export class PythonManager {
   getPort(): number {
     return this.port;
   }
+
+  /** Token para `X-Local-Token` (solo proceso principal; no exponer al renderer). */
+  getLocalToken(): string {
+    return this.localToken;
+  }
+
+  /**
+   * Aplica cambios de configuración que incluyen claves locales (`LOCAL_ONLY_KEYS`),
+   * firmados con el token por arranque. Solo desde el proceso principal.
+   *
+   * @param changes Cambios parciales, p. ej. `{ 'preview.enabled': true }`
+   */
+  async setLocalConfig(changes: Record<string, unknown>): Promise<void> {
+    const res = await fetch(`http://127.0.0.1:${this.port}/api/config`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'X-Local-Token': this.localToken },
+      body: JSON.stringify(changes)
+    });
+    const data = (await res.json()) as { ok?: boolean; reason?: string };
+    if (!res.ok || !data.ok) throw new Error(data.reason || `HTTP ${res.status}`);
+  }
+
+  /** URL de la vista previa MJPEG con el token; solo para ventanas creadas por el proceso principal. */
+  getPreviewUrl(): string {
+    return `http://127.0.0.1:${this.port}/api/cv/preview?token=${encodeURIComponent(this.localToken)}`;
+  }
 }
 
 
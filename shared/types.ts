@@ -27,6 +27,17 @@ export interface PostureAlert {
   dismissible: boolean;
 }
 
+// Evento de transición emitido por el backend en `/api/cv/events`
+export interface AlertEvent {
+  type: 'enter' | 'escalate' | 'clear';
+  seq: number;
+  metric: string;
+  alert_type: PostureAlertType | string;
+  severity: 'warning' | 'critical' | null;
+  ts: number; // epoch en segundos
+  active_for_s: number;
+}
+
 export interface BreakReminder {
   type: BreakType;
   timeWorked: number; // minutos
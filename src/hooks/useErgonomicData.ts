@@ -1,10 +1,19 @@
 import { useCallback, useEffect, useRef } from 'react';
 import type { ErgonomicAnalysis } from '@/types';
+import type { AlertEvent } from '#shared/types';
 import { useErgonomicStore } from '@/store/ergonomicStore';
 
+const ALERT_COPY: Record<string, { title: string; recommendation: string }> = {
+  neck_forward: { title: 'Cuello adelantado', recommendation: 'Eleva el monitor a la altura de los ojos.' },
+  hunched_back: { title: 'Espalda encorvada', recommendation: 'Apoya zona lumbar y reclina 95°–110°.' },
+  poor_arm_position: { title: 'Brazos en tensión', recommendation: 'Relaja hombros y acerca el ratón.' },
+  raised_shoulders: { title: 'Hombros desalineados', recommendation: 'Centra el teclado y relaja los hombros.' }
+};
+
 /**
  * Hook que gestiona la conexión WebSocket para recibir análisis ergonómico en tiempo real.
- * Envía updates al store global y maneja reconexiones.
+ * Envía updates al store global y maneja reconexiones. Las alertas no se evalúan aquí:
+ * el backend emite solo transiciones (`enter` / `escalate`) por `/api/cv/events`.
  * @example
  * useErgonomicData(); // dentro del Dashboard para mantener análisis actualizados
  */
@@ -13,11 +22,14 @@ export function useErgonomicData() {
   const isMonitoring = useErgonomicStore(s => s.isMonitoring);
   const pushAlert = useErgonomicStore(s => s.pushAlert);
   const wsRef = useRef<WebSocket | null>(null);
+  const eventsRef = useRef<WebSocket | null>(null);
+  const lastSeq = useRef<number | null>(null);
   const retryTimer = useRef<number | null>(null);
 
   const connect = useCallback(() => {
     try {
       wsRef.current?.close();
+      eventsRef.current?.close();
       const portPromise: Promise<number> = (window.api as any)?.getBackendPort ? (window.api as any).getBackendPort() : Promise.resolve(5175);
       portPromise.then((port) => {
         const ws = new WebSocket(`ws://127.0.0.1:${port}/api/cv/stream`);
@@ -72,25 +84,6 @@ export function useErgonomicData() {
               }
             };
             updateAnalysis(analysis);
-            // Generar alertas básicas
-            const mk = (k: 'neck' | 'back' | 'arms') => {
-              const status = analysis.statuses[k];
-              if (status === 'good') return;
-              const key = `erg-alert-${k}`;
-              const last = Number(localStorage.getItem(key) || 0);
-              if (Date.now() - last < 30_000) return; // 30s debounce
-              localStorage.setItem(key, String(Date.now()));
-              pushAlert({
-                id: `${key}-${Date.now()}`,
-                kind: 'posture',
-                title: k === 'neck' ? 'Cuello adelantado' : k === 'back' ? 'Espalda encorvada' : 'Brazos en tensión',
-                message: 'Se detectó postura subóptima. Ajusta tu posición para evitar fatiga.',
-                severity: status,
-                recommendation: k === 'neck' ? 'Eleva el monitor a la altura de los ojos.' : k === 'back' ? 'Apoya zona lumbar y reclina 95°–110°.' : 'Relaja hombros y acerca el ratón.',
-                createdAt: Date.now()
-              });
-            };
-            mk('neck'); mk('back'); mk('arms');
           } catch { /* ignore */ }
         };
         ws.onclose = () => {
@@ -99,11 +92,36 @@ export function useErgonomicData() {
         ws.onerror = () => {
           ws.close();
         };
+
+        const since = lastSeq.current !== null ? `?since=${lastSeq.current}` : '';
+        const events = new WebSocket(`ws://127.0.0.1:${port}/api/cv/events${since}`);
+        eventsRef.current = events;
+        events.onmessage = (ev) => {
+          try {
+            const data = JSON.parse(ev.data);
+            if (typeof data?.seq === 'number') lastSeq.current = data.seq;
+            if (data?.type !== 'enter' && data?.type !== 'escalate') return;
+            const event = data as AlertEvent;
+            const copy = ALERT_COPY[event.alert_type] ?? { title: 'Postura subóptima', recommendation: 'Ajusta tu posición.' };
+            pushAlert({
+              id: `erg-alert-${event.alert_type}-${event.seq}`,
+              kind: 'posture',
+              title: copy.title,
+              message: 'Se detectó postura subóptima. Ajusta tu posición para evitar fatiga.',
+              severity: event.severity === 'critical' ? 'critical' : 'warning',
+              recommendation: copy.recommendation,
+              createdAt: Math.round(event.ts * 1000)
+            });
+          } catch { /* ignore */ }
+        };
+        events.onerror = () => {
+          events.close();
+        };
       });
     } catch {
       scheduleReconnect();
     }
-  }, [isMonitoring, updateAnalysis]);
+  }, [isMonitoring, updateAnalysis, pushAlert]);
 
   const scheduleReconnect = useCallback(() => {
     if (retryTimer.current) window.clearTimeout(retryTimer.current);
@@ -113,7 +131,10 @@ export function useErgonomicData() {
   useEffect(() => {
     if (!isMonitoring) return;
     connect();
-    return () => wsRef.current?.close();
+    return () => {
+      wsRef.current?.close();
+      eventsRef.current?.close();
+    };
   }, [isMonitoring, connect]);
 }
 